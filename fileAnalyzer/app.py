@@ -1,16 +1,32 @@
 import os
 import ollama
 import asyncio
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Optional
 import streamlit as st
+from utils.cache import AnalysisCache, content_hash
+from utils.fast_classify import classify_empty_file
 from utils.llm_agents import (
-    file_type_identifier,
-    code_usage_analyzer,
+    analyze_files,
+    check_server_parallelism,
+    PROMPT_VERSION,
     program_overview_analyzer,
 )
 
 # Constants for model and directories
-INPUT_DIR = os.path.join(os.getcwd(), "input")
-OUTPUT_DIR = os.path.join(os.getcwd(), "output")
+BASE_DIR = Path(__file__).resolve().parent
+INPUT_DIR = BASE_DIR / "input"
+OUTPUT_DIR = BASE_DIR / "output"
+REPORT_BUFFER_SIZE = 1 << 17  # 128 KiB write buffer for the streamed report
+REPORT_REFRESH_SECONDS = 0.25  # Minimum interval between streamed report re-renders
+CACHE_PATH = BASE_DIR / "cache" / "analysis_cache.db"
+READ_CONCURRENCY = 64
+# Character budget (~4000 tokens) and file cap for packing small files into one
+# request, leaving room in the file analysis context window for the results
+BATCH_CHAR_BUDGET = 16000
+MAX_BATCH_FILES = 8
 
 
 # Utility Functions
@@ -18,7 +34,23 @@ def update_analysis_state():
     st.session_state["run_analysis"] = True
 
 
-def identify_files(input_dir: str) -> list:
+@st.cache_data(ttl=60, show_spinner=False)
+def get_model_names() -> list:
+    """
+    List the models available on the Ollama server, cached across reruns.
+
+    :return: List of model names.
+    """
+    return [model["model"] for model in ollama.list()["models"]]
+
+
+@st.cache_resource(show_spinner=False)
+def warn_on_low_parallelism() -> None:
+    """Check the Ollama parallelism setting once per process, not on every rerun."""
+    check_server_parallelism()
+
+
+def identify_files(input_dir: Path) -> list:
     """
     Identify and return all file paths within the input directory.
 
@@ -27,90 +59,220 @@ def identify_files(input_dir: str) -> list:
     """
     print(f"Scanning directory: {input_dir} for files...")
     all_files = []
-    for root, _, files in os.walk(input_dir):  # Recursively walk through the directory
-        for file in files:
-            all_files.append(os.path.join(root, file))
+    stack = [input_dir]
+    while stack:  # Iterative DFS; DirEntry caches the file type, avoiding extra stat calls
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        all_files.append(entry.path)
+        except OSError as e:
+            # Skip unreadable directories, or ones removed mid-scan
+            print(f"Error scanning {directory}: {e}")
     print(f"Total files found: {len(all_files)}")
     return all_files
 
 
-def read_files(file_paths: list) -> list:
+def read_file(file_path: str) -> Optional[dict]:
+    """
+    Read the content of a single file.
+
+    :param file_path: Path of the file to read.
+    :return: Dictionary containing filename and contents, or None if unreadable.
     """
-    Read the content of each file and store it in a dictionary.
+    try:
+        contents = Path(file_path).read_text(encoding="utf-8", errors="replace")
+    except OSError as e:
+        print(f"Error reading {file_path}: {e}")
+        return None
+    return {"filename": os.path.basename(file_path), "contents": contents}
+
+
+async def read_files_async(file_paths: list) -> list:
+    """
+    Read the content of each file concurrently in worker threads.
 
     :param file_paths: List of file paths to read.
     :return: List of dictionaries containing filename and contents.
     """
     print("Reading file contents...")
-    code_files = []
-    for file in file_paths:
-        file_content = {}
-        try:
-            with open(file, "r", encoding="utf-8") as f:
-                file_content["filename"] = os.path.basename(file)  # Extract filename
-                file_content["contents"] = f.read()
-                code_files.append(file_content)
-        except Exception as e:
-            print(f"Error reading {file}: {e}")
+    semaphore = asyncio.Semaphore(READ_CONCURRENCY)  # Avoid file descriptor exhaustion
+
+    async def read_one(file_path: str) -> Optional[dict]:
+        async with semaphore:
+            return await asyncio.to_thread(read_file, file_path)
+
+    results = await asyncio.gather(*(read_one(path) for path in file_paths))
+    code_files = [result for result in results if result is not None]
     print(f"Successfully read {len(code_files)} files.")
     return code_files
 
 
-async def fileTypeTask(llm_model: str, code_contents: dict) -> dict:
-    file_type_results = {}
-    file_type_analysis = await file_type_identifier(llm_model, code_contents)
-    file_type_results[file_type_analysis.filename] = file_type_analysis  # Store results
-    response = {
+def batch_files(
+    file_contents: list,
+    char_budget: int = BATCH_CHAR_BUDGET,
+    max_files: int = MAX_BATCH_FILES,
+) -> list:
+    """
+    Pack files into batches whose combined contents fit within a character budget.
+
+    :param file_contents: List of dictionaries containing filename and contents.
+    :param char_budget: Maximum combined content length of a batch.
+    :param max_files: Maximum number of files in a batch.
+    :return: List of batches, each a list of file content dictionaries.
+    """
+    batches = []
+    current_batch, current_size = [], 0
+    for content in sorted(file_contents, key=lambda c: len(c["contents"])):
+        size = len(content["contents"])
+        if current_batch and (
+            current_size + size > char_budget or len(current_batch) >= max_files
+        ):
+            batches.append(current_batch)
+            current_batch, current_size = [], 0
+        current_batch.append(content)
+        current_size += size
+    if current_batch:
+        batches.append(current_batch)
+    return batches
+
+
+def build_context(analysis) -> dict:
+    return {
         "role": "user",
-        "content": f"**Filename:** {file_type_analysis.filename}, **File Type:** {file_type_analysis.file_type}, **Related Programming Language:** {file_type_analysis.related_programming_language}",
+        "content": f"""**Filename:** {analysis.filename}, 
+        **File Type:** {analysis.file_type}, 
+        **Related Programming Language:** {analysis.related_programming_language}, 
+        **File Function:** {analysis.file_function}, 
+        **Summary:** {analysis.summary}, 
+        **Key Components:** {', '.join(analysis.key_components)}""",
     }
-    return response
 
 
-async def fileFunctionTask(llm_model: str, code_contents: dict) -> dict:
-    file_function_analysis = await code_usage_analyzer(llm_model, code_contents)
-    response = {
-        "role": "user",
-        "content": f"""**Filename:** {file_function_analysis.filename}, 
-        **File Type:** {file_function_analysis.file_type}, 
-        **File Function:** {file_function_analysis.file_function}, 
-        **Summary:** {file_function_analysis.summary}, 
-        **Key Components:** {', '.join(file_function_analysis.key_components)}""",
-    }
-    return response
+def match_analyses(batch: list, analyses: list) -> tuple:
+    """
+    Pair each analysis with the file it describes.
 
+    Every analysis is checked against the filenames in the batch, so a reordered response
+    never pairs an analysis with the wrong file. Files sharing a basename are matched in
+    request order; analyses naming no remaining file are dropped.
 
-async def run_analysis(llm_model):
+    :param batch: List of dictionaries containing filename and contents.
+    :param analyses: FileFunctionAnalysis objects returned for the batch.
+    :return: List of (file content dictionary, FileFunctionAnalysis) pairs, and the list of
+        files no analysis was matched to.
+    """
+    if len(batch) == 1 and len(analyses) == 1:
+        # A single-file request can only describe that file
+        return [(batch[0], analyses[0])], []
+    pending = defaultdict(deque)
+    for index, content in enumerate(batch):
+        pending[content["filename"]].append(index)
+    pairs = []
+    for analysis in analyses:
+        indices = pending.get(analysis.filename)
+        if indices:
+            pairs.append((batch[indices.popleft()], analysis))
+    unmatched = sorted(index for indices in pending.values() for index in indices)
+    return pairs, [batch[index] for index in unmatched]
+
+
+async def run_analysis(llm_model, report_placeholder):
     # Step 1: Extract file contents
     code_files = identify_files(INPUT_DIR)
-    file_contents = read_files(code_files)
+    file_contents = await read_files_async(code_files)
 
     # Context list to store analysis results
     context = []
 
-    # Step 2: Identify programming language and file type
-    file_type_tasks = [fileTypeTask(llm_model, content) for content in file_contents]
-    file_analysis_results = await asyncio.gather(*file_type_tasks)
-    context += file_analysis_results
-
-    # Step 3: Identify file function
-    file_function_tasks = [
-        fileFunctionTask(llm_model, content) for content in file_contents
+    # Step 2: Identify file type, programming language and function in one pass
+    # Identical contents are analyzed once, and contents analyzed by the same
+    # model in an earlier run are served from the cache
+    # Empty files are classified by extension without an LLM call
+    file_analysis_results = []
+    files_by_hash = defaultdict(list)
+    for content in file_contents:
+        empty_file_analysis = classify_empty_file(content)
+        if empty_file_analysis is not None:
+            file_analysis_results.append(build_context(empty_file_analysis))
+        else:
+            files_by_hash[content_hash(content["contents"])].append(content)
+
+    analyses_by_hash = {}
+    with AnalysisCache(CACHE_PATH, PROMPT_VERSION) as cache:
+        for key in files_by_hash:
+            cached = cache.get(llm_model, key)
+            if cached is not None:
+                analyses_by_hash[key] = cached
+        print(
+            f"Empty files: {len(file_analysis_results)}/{len(file_contents)}, "
+            f"unique contents: {len(files_by_hash)}, "
+            f"cache hits: {len(analyses_by_hash)}."
+        )
+
+        uncached_contents = [
+            files[0]
+            for key, files in files_by_hash.items()
+            if key not in analyses_by_hash
+        ]
+        batches = batch_files(uncached_contents)
+        batch_analyses = await analyze_files(llm_model, batches)
+        pairs, unmatched = [], []
+        for batch, analyses in zip(batches, batch_analyses):
+            batch_pairs, batch_unmatched = match_analyses(batch, analyses)
+            pairs += batch_pairs
+            unmatched += batch_unmatched
+
+        # Files the model skipped or misnamed in a batch are analyzed on their own
+        if unmatched:
+            print(f"Re-analyzing {len(unmatched)} files missing from batched results.")
+            retried = await analyze_files(llm_model, [[content] for content in unmatched])
+            pairs += [
+                (content, analyses[0]) for content, analyses in zip(unmatched, retried)
+            ]
+
+        for content, analysis in pairs:
+            key = content_hash(content["contents"])
+            cache.put(llm_model, key, analysis)
+            analyses_by_hash[key] = analysis
+
+    file_analysis_results += [
+        build_context(
+            analyses_by_hash[key].model_copy(update={"filename": content["filename"]})
+        )
+        for key, files in files_by_hash.items()
+        if key in analyses_by_hash
+        for content in files
     ]
-    file_function_results = await asyncio.gather(*file_function_tasks)
-    context += file_function_results
-
-    # Step 4: Analyze overall program
-    program_overview = await program_overview_analyzer(llm_model, context)
-
-    # Step 5: Save results to output directory
-    with open(os.path.join(OUTPUT_DIR, "Code Analysis Report.md"), "w") as f:
-        f.write(program_overview)
+    context += file_analysis_results
 
+    # Step 3: Analyze overall program, streaming the report to the UI and output directory
+    report = ""
+    last_render = time.monotonic()
+    report_path = OUTPUT_DIR / "Code Analysis Report.md"
+    with open(report_path, "w", buffering=REPORT_BUFFER_SIZE, encoding="utf-8") as f:
+        async for chunk in program_overview_analyzer(llm_model, context, sink=f.write):
+            report += chunk
+            # Re-rendering sends the whole report, so only refresh a few times a second
+            if time.monotonic() - last_render >= REPORT_REFRESH_SECONDS:
+                report_placeholder.markdown(report)
+                last_render = time.monotonic()
+
+    program_overview = report.strip()
+    report_placeholder.markdown(program_overview)
     return program_overview
 
 
 async def main():
+    # Start gathered coroutines eagerly until their first real suspension (Python 3.12+)
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
+    warn_on_low_parallelism()
+
     # Streamlit Setup
     st.set_page_config(page_title="Code Analyzer")
 
@@ -118,8 +280,7 @@ async def main():
         st.session_state["run_analysis"] = False
 
     st.write("## LLM Model Selection")
-    list_of_models = ollama.list()["models"]
-    model_names = [model["model"] for model in list_of_models]
+    model_names = get_model_names()
     llm_model = st.selectbox(
         "Which Ollama LLM Model do you want to use for analysis?",
         model_names,
@@ -132,24 +293,28 @@ async def main():
         "Upload files for analysis", accept_multiple_files=True
     )
 
-    for uploaded_file in uploaded_files:
-        bytes_data = uploaded_file.read()
-        file_path = os.path.join(INPUT_DIR, uploaded_file.name)
-
-        # Save the file to the input folder
-        with open(file_path, "wb") as f:
-            f.write(bytes_data)
+    # Save the files to the input folder concurrently, off the event loop
+    await asyncio.gather(
+        *(
+            asyncio.to_thread(
+                (INPUT_DIR / uploaded_file.name).write_bytes,
+                uploaded_file.getvalue(),
+            )
+            for uploaded_file in uploaded_files
+        )
+    )
 
     # File Analysis
     if uploaded_files and llm_model:
         if not st.session_state["run_analysis"]:
             st.button("Run Analytics", on_click=update_analysis_state)
         else:
-            with st.spinner("Performing Analysis...", show_time=True):
-                response = await run_analysis(llm_model=llm_model)
-
             st.divider()
-            st.markdown(response)
+            report_placeholder = st.empty()
+            with st.spinner("Performing Analysis...", show_time=True):
+                response = await run_analysis(
+                    llm_model=llm_model, report_placeholder=report_placeholder
+                )
 
             st.download_button(
                 label="Download Report",
@@ -0,0 +1,122 @@
+"""Tests for pairing batched analyses with their files before they are cached.
+
+Run with: ``python -m pytest tests`` from the fileAnalyzer directory.
+"""
+
+import asyncio
+
+import app
+from utils.cache import AnalysisCache, content_hash
+from utils.structured_response import FileFunctionAnalysis
+
+
+def analysis(filename: str, summary: str = "") -> FileFunctionAnalysis:
+    return FileFunctionAnalysis(
+        filename=filename,
+        file_type="Python script",
+        related_programming_language="Python",
+        file_function="Test fixture",
+        summary=summary or f"Describes {filename}",
+        key_components=[],
+    )
+
+
+def file(filename: str, contents: str) -> dict:
+    return {"filename": filename, "contents": contents}
+
+
+def described(pairs: list) -> list:
+    return [(content["contents"], result.summary) for content, result in pairs]
+
+
+def test_reordered_response_is_paired_by_filename():
+    batch = [file("a.py", "A"), file("b.py", "B"), file("c.py", "C")]
+    analyses = [analysis("c.py", "c"), analysis("a.py", "a"), analysis("b.py", "b")]
+
+    pairs, unmatched = app.match_analyses(batch, analyses)
+
+    assert described(pairs) == [("C", "c"), ("A", "a"), ("B", "b")]
+    assert unmatched == []
+
+
+def test_missing_file_is_left_unmatched():
+    batch = [file("a.py", "A"), file("b.py", "B"), file("c.py", "C")]
+    analyses = [analysis("a.py", "a"), analysis("c.py", "c")]
+
+    pairs, unmatched = app.match_analyses(batch, analyses)
+
+    assert described(pairs) == [("A", "a"), ("C", "c")]
+    assert unmatched == [file("b.py", "B")]
+
+
+def test_misnamed_file_is_left_unmatched():
+    batch = [file("a.py", "A"), file("b.py", "B")]
+    analyses = [analysis("a.py", "a"), analysis("b.js", "b")]
+
+    pairs, unmatched = app.match_analyses(batch, analyses)
+
+    # Pairing by position would have cached the b.js analysis under b.py's hash
+    assert described(pairs) == [("A", "a")]
+    assert unmatched == [file("b.py", "B")]
+
+
+def test_duplicate_basenames_are_paired_in_request_order():
+    batch = [file("__init__.py", "first"), file("a.py", "A"), file("__init__.py", "second")]
+    analyses = [
+        analysis("a.py", "a"),
+        analysis("__init__.py", "init 1"),
+        analysis("__init__.py", "init 2"),
+    ]
+
+    pairs, unmatched = app.match_analyses(batch, analyses)
+
+    assert described(pairs) == [("A", "a"), ("first", "init 1"), ("second", "init 2")]
+    assert unmatched == []
+
+
+def test_duplicate_basename_without_its_own_analysis_is_left_unmatched():
+    batch = [file("__init__.py", "first"), file("__init__.py", "second")]
+    analyses = [analysis("__init__.py", "init 1")]
+
+    pairs, unmatched = app.match_analyses(batch, analyses)
+
+    assert described(pairs) == [("first", "init 1")]
+    assert unmatched == [file("__init__.py", "second")]
+
+
+def test_unmatched_files_are_reanalyzed_before_caching(monkeypatch, tmp_path):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    (input_dir / "a.py").write_text("print('a')")
+    (input_dir / "b.py").write_text("print('b')")
+    monkeypatch.setattr(app, "INPUT_DIR", input_dir)
+    monkeypatch.setattr(app, "OUTPUT_DIR", tmp_path)
+    monkeypatch.setattr(app, "CACHE_PATH", tmp_path / "cache.db")
+
+    requests = []
+
+    async def analyze_files(llm_model, batches):
+        requests.append([[content["filename"] for content in batch] for batch in batches])
+        if len(batches) == 1 and len(batches[0]) == 2:
+            # The batched reply misnames b.py
+            return [[analysis("a.py", "a"), analysis("b.js", "wrong")]]
+        return [[analysis(batch[0]["filename"], "retried")] for batch in batches]
+
+    async def program_overview_analyzer(llm_model, context, sink):
+        sink("report")
+        yield "report"
+
+    class Placeholder:
+        def markdown(self, text):
+            pass
+
+    monkeypatch.setattr(app, "analyze_files", analyze_files)
+    monkeypatch.setattr(app, "program_overview_analyzer", program_overview_analyzer)
+
+    asyncio.run(app.run_analysis("model", Placeholder()))
+
+    assert [sorted(batch) for batch in requests[0]] == [["a.py", "b.py"]]
+    assert requests[1] == [["b.py"]]
+    with AnalysisCache(tmp_path / "cache.db", app.PROMPT_VERSION) as cache:
+        assert cache.get("model", content_hash("print('a')")).summary == "a"
+        assert cache.get("model", content_hash("print('b')")).summary == "retried"
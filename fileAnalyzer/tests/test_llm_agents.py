@@ -0,0 +1,23 @@
+"""Tests for the streamed <think> section filter.
+
+Run with: ``python -m pytest tests`` from the fileAnalyzer directory.
+"""
+
+from utils.llm_agents import ThinkStripper
+
+
+def strip(chunks):
+    stripper = ThinkStripper()
+    return "".join(stripper.feed(chunk) for chunk in chunks) + stripper.flush()
+
+
+def test_think_section_is_dropped_across_chunks():
+    chunks = ["<thi", "nk>reasoning</th", "ink>\n\n# Rep", "ort"]
+
+    assert strip(chunks) == "# Report"
+
+
+def test_unterminated_think_section_is_emitted_on_flush():
+    chunks = ["<think>", "# Report\n", "The project is a CLI.", "</thi"]
+
+    assert strip(chunks) == "# Report\nThe project is a CLI.</thi"
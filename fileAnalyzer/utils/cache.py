@@ -0,0 +1,85 @@
+import json
+import sqlite3
+from hashlib import blake2b
+from pathlib import Path
+from typing import Optional
+from utils.structured_response import FileFunctionAnalysis
+
+
+def content_hash(contents: str) -> bytes:
+    """
+    Hash file contents for use as a cache key.
+
+    :param contents: File contents to hash.
+    :return: 16-byte BLAKE2b digest.
+    """
+    return blake2b(contents.encode("utf-8"), digest_size=16).digest()
+
+
+def schema_hash() -> str:
+    """
+    Fingerprint the FileFunctionAnalysis schema so schema changes invalidate the cache.
+
+    :return: Hex digest of the JSON schema.
+    """
+    schema = json.dumps(FileFunctionAnalysis.model_json_schema(), sort_keys=True)
+    return blake2b(schema.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class AnalysisCache:
+    """SQLite-backed cache of file analyses keyed by (model, version, content hash)."""
+
+    def __init__(self, db_path: Path, prompt_version: int):
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.version = f"{prompt_version}-{schema_hash()}"
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """CREATE TABLE IF NOT EXISTS analyses (
+                model TEXT NOT NULL,
+                version TEXT NOT NULL,
+                hash BLOB NOT NULL,
+                json TEXT NOT NULL,
+                PRIMARY KEY (model, version, hash)
+            )"""
+        )
+        self.connection.commit()
+
+    def get(self, llm_model: str, key: bytes) -> Optional[FileFunctionAnalysis]:
+        """
+        Look up a cached analysis.
+
+        :param llm_model: LLM model name the analysis was produced with.
+        :param key: Content hash of the analyzed file.
+        :return: Cached FileFunctionAnalysis, or None on a miss.
+        """
+        row = self.connection.execute(
+            "SELECT json FROM analyses WHERE model = ? AND version = ? AND hash = ?",
+            (llm_model, self.version, key),
+        ).fetchone()
+        if row is None:
+            return None
+        return FileFunctionAnalysis.model_validate_json(row[0])
+
+    def put(self, llm_model: str, key: bytes, analysis: FileFunctionAnalysis) -> None:
+        """
+        Store an analysis, replacing any previous entry for the same key.
+
+        :param llm_model: LLM model name the analysis was produced with.
+        :param key: Content hash of the analyzed file.
+        :param analysis: FileFunctionAnalysis to cache.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO analyses (model, version, hash, json) VALUES (?, ?, ?, ?)",
+            (llm_model, self.version, key, analysis.model_dump_json()),
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
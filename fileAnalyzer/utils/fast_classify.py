@@ -0,0 +1,69 @@
+import os
+from typing import Optional
+from utils.structured_response import FileFunctionAnalysis
+
+# Extensions whose file type and language are unambiguous
+EXTENSION_TYPES = {
+    ".py": ("Python script", "Python"),
+    ".ipynb": ("Jupyter notebook", "Python"),
+    ".js": ("JavaScript source", "JavaScript"),
+    ".jsx": ("JavaScript React component", "JavaScript"),
+    ".ts": ("TypeScript source", "TypeScript"),
+    ".tsx": ("TypeScript React component", "TypeScript"),
+    ".java": ("Java source", "Java"),
+    ".go": ("Go source", "Go"),
+    ".rs": ("Rust source", "Rust"),
+    ".c": ("C source", "C"),
+    ".h": ("C header", "C"),
+    ".cpp": ("C++ source", "C++"),
+    ".hpp": ("C++ header", "C++"),
+    ".cs": ("C# source", "C#"),
+    ".rb": ("Ruby script", "Ruby"),
+    ".php": ("PHP script", "PHP"),
+    ".sh": ("Shell script", "Shell"),
+    ".ps1": ("PowerShell script", "PowerShell"),
+    ".sql": ("SQL script", "SQL"),
+    ".html": ("HTML document", "HTML"),
+    ".css": ("CSS stylesheet", "CSS"),
+    ".md": ("Markdown documentation", "Markdown"),
+    ".json": ("JSON configuration", "JSON"),
+    ".yaml": ("YAML configuration", "YAML"),
+    ".yml": ("YAML configuration", "YAML"),
+    ".toml": ("TOML configuration", "TOML"),
+    ".ini": ("INI configuration", "INI"),
+    ".xml": ("XML document", "XML"),
+    ".txt": ("Text file", "Plain text"),
+}
+
+
+def classify_by_extension(filename: str) -> Optional[tuple]:
+    """
+    Look up the file type and language implied by a file's extension.
+
+    :param filename: Name of the file.
+    :return: (file_type, related_programming_language), or None if unknown.
+    """
+    return EXTENSION_TYPES.get(os.path.splitext(filename)[1].lower())
+
+
+def classify_empty_file(code_contents: dict) -> Optional[FileFunctionAnalysis]:
+    """
+    Build the analysis of an empty file without calling the LLM.
+
+    :param code_contents: Dictionary containing filename and contents.
+    :return: FileFunctionAnalysis object, or None if the file has content.
+    """
+    if code_contents["contents"].strip():
+        return None
+    file_type, language = classify_by_extension(code_contents["filename"]) or (
+        "Empty file",
+        "Unknown",
+    )
+    return FileFunctionAnalysis(
+        filename=code_contents["filename"],
+        file_type=file_type,
+        related_programming_language=language,
+        file_function="Placeholder with no content (e.g. a package marker).",
+        summary="The file is empty.",
+        key_components=[],
+    )
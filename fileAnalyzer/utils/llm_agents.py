@@ -1,85 +1,230 @@
+import os
 import re
+import asyncio
+import logging
+from typing import Callable, Optional
 from ollama import AsyncClient
-from utils.structured_response import FileTypeAnalysis, FileFunctionAnalysis
+from utils.structured_response import FileFunctionAnalysis, FileFunctionAnalysisBatch
 
+logger = logging.getLogger(__name__)
 
-def clean_llm_response(response_text: str) -> str:
+
+def _env_positive_int(name: str, default: int) -> int:
     """
-    Removes the <think>...</think> portion from the LLM response.
+    Read a positive integer setting from the environment.
 
-    :param response_text: The raw response text from the LLM.
-    :return: Cleaned response text without the <think> section.
+    :param name: Environment variable name.
+    :param default: Value used when the variable is unset or invalid.
+    :return: The configured value, or the default.
     """
-    return re.sub(r"<think>.*?</think>", "", response_text, flags=re.DOTALL).strip()
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        logger.warning("Ignoring invalid %s=%r; using %d.", name, value, default)
+        return default
+    return parsed
+
+
+# Maximum number of concurrent LLM requests issued by analyze_files
+DEFAULT_CONCURRENCY = _env_positive_int("LLM_CONCURRENCY", 4)
+
+# Bump whenever the file analysis prompts or FILE_ANALYSIS_OPTIONS change so cached
+# analyses are invalidated
+PROMPT_VERSION = 5
+
+# Oversized file contents keep their head, tail and declaration lines only
+MAX_CONTENT_CHARS = 6000
+HEAD_CHARS = 3000
+TAIL_CHARS = 2000
+MAX_KEY_LINE_CHARS = 2000
+KEY_LINE_PATTERN = re.compile(
+    r"^[ \t]*(?:(?:async[ \t]+)?def|class|import|from[ \t]+\S+[ \t]+import|function|export|#include|package)\b.*$",
+    re.MULTILINE,
+)
+
+# Greedy, seeded decoding makes file analyses deterministic, so cached results are
+# exactly what a fresh call would return.
+# Every call uses one of two fixed context profiles: changing num_ctx between requests
+# makes Ollama reallocate the slot and discard its KV cache, including the prefilled
+# system prompt. The file analysis window fits one prepared file or a full batch.
+FILE_ANALYSIS_OPTIONS = {"temperature": 0.0, "seed": 42, "num_ctx": 8192}
+OVERVIEW_OPTIONS = {"temperature": 0.3, "num_ctx": 16000}
+
+# Output schemas are built once; the identical format lets Ollama reuse its compiled grammar
+FILE_FUNCTION_SCHEMA = FileFunctionAnalysis.model_json_schema()
+FILE_FUNCTION_BATCH_SCHEMA = FileFunctionAnalysisBatch.model_json_schema()
+
+# System prompts are module constants so every request starts with a byte-identical
+# prefix that Ollama can serve from its KV cache; all variable parts go in the user prompt
+FILE_ANALYSIS_SYSTEM_PROMPT = {
+    "role": "system",
+    "content": """You are an expert software engineer tasked with analyzing software project files.
+    For each file you are given, identify:
+    1. The filename of the file being analyzed.
+    2. The type of file (e.g., Python script, JSON configuration, Markdown documentation).
+    3. The programming language used or related to the file.
+    4. The function or purpose of the file within a software project.
+    5. A concise summary of what the file does.
+    6. The key components present in the file (e.g., important functions, dependencies, configurations).
+    """,
+}
+
+OVERVIEW_SYSTEM_PROMPT = {
+    "role": "system",
+    "content": "You are an expert software engineer who specializes in reverse engineering and software analysis.",
+}
+
+# Shared client, rebuilt only when the event loop changes (e.g. on a Streamlit rerun)
+_client = None
+_client_loop = None
 
 
-async def file_type_identifier(llm_model: str, code_contents: dict) -> FileTypeAnalysis:
+def get_client() -> AsyncClient:
     """
-    Identify the file type and related programming language using an LLM.
+    Return the AsyncClient bound to the running event loop.
 
-    :param llm_model: LLM model name to use.
-    :param code_contents: Dictionary containing filename and contents.
-    :return: FileTypeAnalysis object.
+    Reusing one client keeps its HTTP connection pool alive across calls.
+
+    :return: Shared AsyncClient instance.
     """
-    print(f"Analyzing file type for {code_contents['filename']}...")
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = AsyncClient()
+        _client_loop = loop
+    return _client
 
-    system_prompt = {
-        "role": "system",
-        "content": """You are an expert software engineer. 
-        You will be given file contents to analyze and your job is to identify the following:
-        1. Filename: Name of the file whose contents are being analyzed.
-        2. File type: Identify the file type based on its content and name.
-        3. Related Programming Language: Identify the programming language used or related to the file.
-        """,
-    }
 
-    user_prompt = {
-        "role": "user",
-        "content": f"""Analyze the contents below to identify the file type and programming language.
+class ThinkStripper:
+    """Single-pass filter that drops <think>...</think> sections from a streamed response."""
 
-        **Filename:** {code_contents['filename']}
-        
-        **File contents:**
-        {code_contents['contents']}
-        """,
-    }
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
 
-    message = [system_prompt, user_prompt]
-    chat_completion = await AsyncClient().chat(
-        model=llm_model,
-        messages=message,
-        options={"temperature": 0.3, "num_ctx": 2048},
-        format=FileTypeAnalysis.model_json_schema(),
-    )
-    response = FileTypeAnalysis.model_validate_json(chat_completion.message.content)
+    def __init__(self):
+        self.buffer = ""
+        self.think_text = ""
+        self.in_think = False
+        self.started = False
 
-    print(f"File type analysis complete: {response.filename} is a {response.file_type}")
-    return response
+    def feed(self, text: str) -> str:
+        """
+        Consume a streamed chunk.
+
+        :param text: Next chunk of the raw response.
+        :return: Text outside <think> sections that is safe to emit so far.
+        """
+        self.buffer += text
+        output = []
+        while True:
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            index = self.buffer.find(tag)
+            if index == -1:
+                # Hold back a trailing partial tag until the next chunk completes it
+                held = self._partial_tag_length(tag)
+                if self.in_think:
+                    self.think_text += self.buffer[: len(self.buffer) - held]
+                else:
+                    output.append(self.buffer[: len(self.buffer) - held])
+                self.buffer = self.buffer[len(self.buffer) - held :]
+                break
+            if not self.in_think:
+                output.append(self.buffer[:index])
+            self.think_text = ""
+            self.buffer = self.buffer[index + len(tag) :]
+            self.in_think = not self.in_think
+        return self._emit("".join(output))
+
+    def flush(self) -> str:
+        """
+        Release any held-back text once the stream has ended.
+
+        A <think> section that was never closed is emitted as-is, since the model may
+        have written its whole answer after an unmatched open tag.
+
+        :return: Remaining text outside <think> sections.
+        """
+        remaining = self.think_text + self.buffer if self.in_think else self.buffer
+        self.buffer = self.think_text = ""
+        return self._emit(remaining)
+
+    def _partial_tag_length(self, tag: str) -> int:
+        for length in range(min(len(tag) - 1, len(self.buffer)), 0, -1):
+            if self.buffer.endswith(tag[:length]):
+                return length
+        return 0
+
+    def _emit(self, text: str) -> str:
+        # Leading whitespace (typically left after a </think> block) is dropped
+        if not self.started:
+            text = text.lstrip()
+            self.started = bool(text)
+        return text
+
+
+def check_server_parallelism(concurrency: int = DEFAULT_CONCURRENCY) -> None:
+    """
+    Warn when Ollama is configured to run fewer requests in parallel than we issue.
+
+    :param concurrency: Number of concurrent requests the app will send.
+    """
+    num_parallel = os.environ.get("OLLAMA_NUM_PARALLEL")
+    if num_parallel is None:
+        return
+    try:
+        parallel = int(num_parallel)
+    except ValueError:
+        logger.warning("Ignoring non-integer OLLAMA_NUM_PARALLEL=%r.", num_parallel)
+        return
+    if parallel < concurrency:
+        logger.warning(
+            "OLLAMA_NUM_PARALLEL=%s is below LLM_CONCURRENCY=%d; extra requests will "
+            "queue on the Ollama server instead of running in parallel.",
+            num_parallel,
+            concurrency,
+        )
+
+
+def prepare_contents(contents: str, max_chars: int = MAX_CONTENT_CHARS) -> str:
+    """
+    Shrink oversized file contents to their head, tail and key declaration lines.
+
+    :param contents: File contents to prepare.
+    :param max_chars: Contents at or below this length are returned unchanged.
+    :return: Contents, with the middle replaced by its declaration lines if over budget.
+    """
+    if len(contents) <= max_chars:
+        return contents
+    middle = contents[HEAD_CHARS : len(contents) - TAIL_CHARS]
+    key_lines = "\n".join(
+        match.group().strip() for match in KEY_LINE_PATTERN.finditer(middle)
+    )[:MAX_KEY_LINE_CHARS]
+    return (
+        contents[:HEAD_CHARS]
+        + f"\n...[truncated {len(middle)} chars; declarations in the omitted part:]\n"
+        + key_lines
+        + "\n...[end of truncated part]...\n"
+        + contents[-TAIL_CHARS:]
+    )
 
 
 async def code_usage_analyzer(
     llm_model: str, code_contents: dict
 ) -> FileFunctionAnalysis:
     """
-    Analyze a file to determine its function and key components.
+    Analyze a file to determine its type, programming language, function and key components.
 
     :param llm_model: LLM model name to use.
     :param code_contents: Dictionary containing filename and contents.
     :return: FileFunctionAnalysis object.
     """
-    print(f"Analyzing function for {code_contents['filename']}...")
-
-    system_prompt = {
-        "role": "system",
-        "content": """You are an expert software engineer tasked with analyzing software project files.
-        Your job is to identify:
-        1. The filename of the file being analyzed.
-        2. The type of file (e.g., Python script, JSON configuration, Markdown documentation).
-        3. The function or purpose of the file within a software project.
-        4. A concise summary of what the file does.
-        5. The key components present in the file (e.g., important functions, dependencies, configurations).
-        """,
-    }
+    logger.debug("Analyzing function for %s...", code_contents["filename"])
+    contents = prepare_contents(code_contents["contents"])
 
     user_prompt = {
         "role": "user",
@@ -88,40 +233,112 @@ async def code_usage_analyzer(
         Filename: {code_contents['filename']}
         
         File Contents:
-        {code_contents['contents']}
+        {contents}
         
         Based on the above, provide:
         - The type of file.
+        - The related programming language.
         - The function or purpose of the file.
         - A summary explaining what this file does.
         - Key components or elements found in the file.
         """,
     }
 
-    message = [system_prompt, user_prompt]
-    chat_completion = await AsyncClient().chat(
+    message = [FILE_ANALYSIS_SYSTEM_PROMPT, user_prompt]
+    chat_completion = await get_client().chat(
         model=llm_model,
         messages=message,
-        options={"temperature": 0.3, "num_ctx": 8000},
-        format=FileFunctionAnalysis.model_json_schema(),
+        options=FILE_ANALYSIS_OPTIONS,
+        format=FILE_FUNCTION_SCHEMA,
     )
     response = FileFunctionAnalysis.model_validate_json(chat_completion.message.content)
 
-    print(f"Function analysis complete for {response.filename}.")
+    logger.debug("Function analysis complete for %s.", response.filename)
     return response
 
 
-async def program_overview_analyzer(llm_model: str, context: list) -> str:
-    """Analyze the overall purpose of the project based on the analyzed files."""
-    print("\nAnalyzing overall program purpose...")
+async def code_usage_analyzer_batch(
+    llm_model: str, batch_contents: list
+) -> list[FileFunctionAnalysis]:
+    """
+    Analyze several small files in a single LLM request.
+
+    :param llm_model: LLM model name to use.
+    :param batch_contents: List of dictionaries containing filename and contents.
+    :return: List of FileFunctionAnalysis objects, one per file.
+    """
+    logger.debug("Analyzing function for a batch of %d files...", len(batch_contents))
+
+    file_blocks = "\n\n".join(
+        f"""### File {index}
+        Filename: {code_contents['filename']}
 
-    system_prompt = {
-        "role": "system",
-        "content": "You are an expert software engineer who specializes in reverse engineering and software analysis.",
+        File Contents:
+        {prepare_contents(code_contents['contents'])}"""
+        for index, code_contents in enumerate(batch_contents, start=1)
+    )
+    user_prompt = {
+        "role": "user",
+        "content": f"""Analyze each of the {len(batch_contents)} files below and determine its function in a software project.
+        Return exactly one result per file, in the order the files are given (File 1 first).
+
+        {file_blocks}
+        """,
     }
 
-    # Insert the system prompt at the beginning of the context list
-    context.insert(0, system_prompt)
+    message = [FILE_ANALYSIS_SYSTEM_PROMPT, user_prompt]
+    chat_completion = await get_client().chat(
+        model=llm_model,
+        messages=message,
+        options=FILE_ANALYSIS_OPTIONS,
+        format=FILE_FUNCTION_BATCH_SCHEMA,
+    )
+    response = FileFunctionAnalysisBatch.model_validate_json(
+        chat_completion.message.content
+    )
+
+    logger.debug("Function analysis complete for batch of %d files.", len(response.results))
+    return response.results
+
+
+async def analyze_files(
+    llm_model: str, batches: list, concurrency: int = DEFAULT_CONCURRENCY
+) -> list[list[FileFunctionAnalysis]]:
+    """
+    Analyze batches of files concurrently, with at most `concurrency` requests in flight.
+
+    Single-file batches use code_usage_analyzer; larger ones use code_usage_analyzer_batch.
+
+    :param llm_model: LLM model name to use.
+    :param batches: List of batches, each a list of dictionaries containing filename and contents.
+    :param concurrency: Maximum number of concurrent LLM requests.
+    :return: List of FileFunctionAnalysis lists, aligned with `batches`.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def analyze_batch(batch: list) -> list[FileFunctionAnalysis]:
+        async with semaphore:
+            if len(batch) == 1:
+                return [await code_usage_analyzer(llm_model, batch[0])]
+            return await code_usage_analyzer_batch(llm_model, batch)
+
+    return await asyncio.gather(*(analyze_batch(batch) for batch in batches))
+
+
+async def program_overview_analyzer(
+    llm_model: str, context: list, sink: Optional[Callable[[str], object]] = None
+):
+    """
+    Analyze the overall purpose of the project based on the analyzed files.
+
+    Streams the report as it is generated, with <think> sections removed on the fly.
+
+    :param llm_model: LLM model name to use.
+    :param context: List of chat messages describing the analyzed files.
+    :param sink: Optional callable receiving each chunk as it arrives (e.g. a file's write).
+    :return: Async generator of report text chunks.
+    """
+    logger.debug("Analyzing overall program purpose...")
 
     user_prompt = {
         "role": "user",
@@ -130,15 +347,27 @@ async def program_overview_analyzer(llm_model: str, context: list) -> str:
         """,
     }
 
-    # Append the user prompt at the end of the context list
-    context.append(user_prompt)
+    # Build a fresh message list so the caller's context is left untouched
+    messages = [OVERVIEW_SYSTEM_PROMPT, *context, user_prompt]
 
-    chat_completion = await AsyncClient().chat(
+    stream = await get_client().chat(
         model=llm_model,
-        messages=context,
-        options={"temperature": 0.3, "num_ctx": 16000},
+        messages=messages,
+        options=OVERVIEW_OPTIONS,
+        stream=True,
     )
-    response = chat_completion.message.content
+    think_stripper = ThinkStripper()
+    async for chunk in stream:
+        content = think_stripper.feed(chunk.message.content)
+        if content:
+            if sink is not None:
+                sink(content)
+            yield content
+
+    content = think_stripper.flush()
+    if content:
+        if sink is not None:
+            sink(content)
+        yield content
 
-    print("Program overview analysis complete.")
-    return clean_llm_response(response)
+    logger.debug("Program overview analysis complete.")
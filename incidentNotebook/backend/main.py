@@ -1,10 +1,12 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .routers import cases, workflow
 from .models import CaseResponse
+from backend.utils import llm
+from backend.utils.database import init_db
 from backend.utils.logging_config import setup_logging
 import logging
 
-setup_logging()
 logger = logging.getLogger(__name__)
 
 description = """
@@ -12,12 +14,24 @@ Incident Notebook API
 Convert incident descriptions into structured IOCs and timeline events using agentic workflows.
 """
 
-logger.info("Backend initialized and logging configured at backend/logs/backend.log")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker process at startup, not as an import side effect
+    setup_logging()
+    init_db()
+    logger.info("Backend initialized and logging configured at backend/logs/backend.log")
+    # Hold the shared LLM provider open so requests reuse its keep-alive connections;
+    # its HTTP client is closed on shutdown
+    async with llm.get_provider():
+        yield
+
 
 app = FastAPI(
     title="Incident Notebook API",
     description=description,
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Add CORS Middleware
@@ -1,7 +1,10 @@
 from typing import List, Optional, Annotated
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from datetime import datetime
 
+# Response models are read-only snapshots of DB rows
+_READ_ONLY = ConfigDict(from_attributes=True, frozen=True)
+
 # Case Models
 class CaseCreateRequest(BaseModel):
     name: str
@@ -14,14 +17,22 @@ class CaseResponse(BaseModel):
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
 
-    class Config:
-        from_attributes = True
+    model_config = _READ_ONLY
+
+# Serializer for GET /cases, built once at import
+CASE_LIST_ADAPTER = TypeAdapter(List[CaseResponse])
+
+class CaseDeleteResponse(BaseModel):
+    status: str
+    message: str
 
 # IOC Models matching utils/ioc_extraction_workflow.py
 # We duplicate the fields here to ensure the API docs match the extraction format.
 # We also add DB-specific fields (id, date_added, case_id) as optional or included.
 
 class TimelineEvent(BaseModel):
+    model_config = _READ_ONLY
+
     # Fields from TimelineOutputFormat
     submitted_by: Annotated[
         str,
@@ -68,6 +79,8 @@ class TimelineEvent(BaseModel):
     )
 
 class HostIOC(BaseModel):
+    model_config = _READ_ONLY
+
     # Fields from HostIOCOutputFormat
     submitted_by: Annotated[
         str,
@@ -116,6 +129,8 @@ class HostIOC(BaseModel):
     )
 
 class NetworkIOC(BaseModel):
+    model_config = _READ_ONLY
+
     # Fields from NetworkIOCOutputFormat
     submitted_by: Annotated[
         str,
@@ -162,6 +177,11 @@ class CaseDataResponse(BaseModel):
     network_iocs: List[NetworkIOC]
     timeline_events: List[TimelineEvent]
 
+# Serializers for the CaseDataResponse lists, built once at import
+HOST_IOC_LIST_ADAPTER = TypeAdapter(List[HostIOC])
+NETWORK_IOC_LIST_ADAPTER = TypeAdapter(List[NetworkIOC])
+TIMELINE_EVENT_LIST_ADAPTER = TypeAdapter(List[TimelineEvent])
+
 # Workflow Models
 class ExtractionRequest(BaseModel):
     incident_description: str
@@ -171,3 +191,6 @@ class ExtractionResponse(BaseModel):
     status: str
     message: str
     counts: dict
+
+class ModelListResponse(BaseModel):
+    models: List[str]
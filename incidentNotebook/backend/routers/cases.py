@@ -1,36 +1,76 @@
-from fastapi import APIRouter, HTTPException
-import pandas as pd
-from typing import List
+from fastapi import APIRouter, HTTPException, Response
+from datetime import datetime
+from typing import List, Optional
 import logging
-from ..models import CaseCreateRequest, CaseResponse, CaseDataResponse
-from backend.utils.database import load_database, create_case, delete_case, Case
+from ..models import (
+    CaseCreateRequest,
+    CaseDeleteResponse,
+    CaseResponse,
+    CaseDataResponse,
+    CASE_LIST_ADAPTER,
+    HostIOC,
+    NetworkIOC,
+    TimelineEvent,
+    HOST_IOC_LIST_ADAPTER,
+    NETWORK_IOC_LIST_ADAPTER,
+    TIMELINE_EVENT_LIST_ADAPTER,
+)
+from backend.utils.database import (
+    create_case,
+    delete_case,
+    get_all_cases,
+    get_case_artifacts,
+    get_case_by_id,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+
+def _json_response(content: bytes) -> Response:
+    """
+    Wrap JSON serialized from trusted DB rows. Returning a Response directly
+    skips FastAPI's response_model validation; the route's response_model
+    still documents the schema.
+    """
+    return Response(content=content, media_type="application/json")
+
+
+def _as_stored(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """
+    SQLite hands timestamps back as naive UTC; render freshly created ones the
+    same way so POST and GET /cases agree (the frontend formats them as UTC).
+    """
+    return timestamp.replace(tzinfo=None) if timestamp is not None else None
+
+
 @router.get("/cases", response_model=List[CaseResponse])
 def get_cases():
     logger.info("Fetching all cases")
-    databases = load_database()
-    cases_df = databases.get("cases")
-    if cases_df is None or cases_df.empty:
+    cases = get_all_cases()
+    if not cases:
         logger.info("No cases found")
-        return []
-    # Convert DataFrame to list of dicts
-    logger.info(f"Found {len(cases_df)} cases")
-    return cases_df.to_dict(orient="records")
+    else:
+        logger.info(f"Found {len(cases)} cases")
+    return _json_response(
+        CASE_LIST_ADAPTER.dump_json([CaseResponse.model_construct(**row) for row in cases])
+    )
 
 @router.post("/cases", response_model=CaseResponse)
 def create_new_case(request: CaseCreateRequest):
     logger.info(f"Creating new case: {request.name}")
     try:
-        case_id = create_case(request.name)
-        # Fetch the created case to return full details
-        databases = load_database()
-        cases_df = databases.get("cases")
-        case = cases_df[cases_df["case_id"] == case_id].iloc[0].to_dict()
-        logger.info(f"Case created successfully: {case_id}")
-        return case
+        case = create_case(request.name)
+        logger.info(f"Case created successfully: {case.case_id}")
+        response = CaseResponse.model_construct(
+            id=case.id,
+            case_id=case.case_id,
+            name=case.name,
+            status=case.status,
+            created_at=_as_stored(case.created_at),
+            updated_at=_as_stored(case.updated_at),
+        )
+        return _json_response(response.model_dump_json())
     except ValueError as e:
         logger.error(f"ValueError creating case: {e}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -41,20 +81,14 @@ def create_new_case(request: CaseCreateRequest):
 @router.get("/cases/{case_id}", response_model=CaseResponse)
 def get_case(case_id: str):
     logger.info(f"Fetching case details for: {case_id}")
-    databases = load_database()
-    cases_df = databases.get("cases")
-    if cases_df is None or cases_df.empty:
-        logger.warning(f"Case {case_id} not found (no cases table)")
-        raise HTTPException(status_code=404, detail="Case not found")
-    
-    case = cases_df[cases_df["case_id"] == case_id]
-    if case.empty:
+    case = get_case_by_id(case_id)
+    if case is None:
         logger.warning(f"Case {case_id} not found")
         raise HTTPException(status_code=404, detail="Case not found")
-    
-    return case.iloc[0].to_dict()
 
-@router.delete("/cases/{case_id}")
+    return _json_response(CaseResponse.model_construct(**case).model_dump_json())
+
+@router.delete("/cases/{case_id}", response_model=CaseDeleteResponse)
 def delete_existing_case(case_id: str):
     logger.info(f"Deleting case: {case_id}")
     success = delete_case(case_id)
@@ -67,27 +101,17 @@ def delete_existing_case(case_id: str):
 @router.get("/cases/{case_id}/data", response_model=CaseDataResponse)
 def get_case_data(case_id: str):
     logger.info(f"Fetching data artifacts for case: {case_id}")
-    databases = load_database()
-    
-    # Filter by case_id
-    host_ioc_df = databases.get("host_ioc")
-    network_ioc_df = databases.get("network_ioc")
-    timeline_df = databases.get("timeline")
-    
-    # helper to filter
-    def filter_by_case(df):
-        if df is None or df.empty:
-            return []
-        # Replace NaN with None to satisfy Pydantic validation
-        df = df.where(pd.notnull(df), None)
-        if "case_id" not in df.columns:
-            return []
-        return df[df["case_id"] == case_id].to_dict(orient="records")
-
-    data = {
-        "host_iocs": filter_by_case(host_ioc_df),
-        "network_iocs": filter_by_case(network_ioc_df),
-        "timeline_events": filter_by_case(timeline_df)
-    }
+    data = get_case_artifacts(case_id)
     logger.info(f"Returned {len(data['host_iocs'])} host IOCs, {len(data['network_iocs'])} network IOCs, {len(data['timeline_events'])} timeline events for case {case_id}")
-    return data
+    # Rows come from our own constrained schema, so build the models without
+    # validation and serialize each list with its prebuilt adapter
+    host_iocs = [HostIOC.model_construct(**row) for row in data["host_iocs"]]
+    network_iocs = [NetworkIOC.model_construct(**row) for row in data["network_iocs"]]
+    timeline_events = [TimelineEvent.model_construct(**row) for row in data["timeline_events"]]
+    content = (
+        b'{"host_iocs":' + HOST_IOC_LIST_ADAPTER.dump_json(host_iocs)
+        + b',"network_iocs":' + NETWORK_IOC_LIST_ADAPTER.dump_json(network_iocs)
+        + b',"timeline_events":' + TIMELINE_EVENT_LIST_ADAPTER.dump_json(timeline_events)
+        + b"}"
+    )
+    return _json_response(content)
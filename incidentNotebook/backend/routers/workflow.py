@@ -1,26 +1,49 @@
 import logging
+from typing import List
 
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import TypeAdapter
 from pydantic_ai.exceptions import ModelAPIError, ModelHTTPError
 
-from ..models import ExtractionRequest, ExtractionResponse
+from ..models import ExtractionRequest, ExtractionResponse, ModelListResponse
 from backend.utils import llm
-from backend.utils.ioc_extraction_workflow import ioc_extraction_agent_workflow
-from backend.utils.database import (
-    insert_host_iocs,
-    insert_network_iocs,
-    insert_timeline_events
+from backend.utils.agents import (
+    HostIOCOutputFormat,
+    NetworkIOCOutputFormat,
+    TimelineOutputFormat,
 )
+from backend.utils.ioc_extraction_workflow import ioc_extraction_agent_workflow
+from backend.utils.database import case_exists, insert_extraction_results
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Serialize each extraction result list in one call instead of a model_dump() per item
+_HOST_IOC_LIST = TypeAdapter(List[HostIOCOutputFormat])
+_NETWORK_IOC_LIST = TypeAdapter(List[NetworkIOCOutputFormat])
+_TIMELINE_LIST = TypeAdapter(List[TimelineOutputFormat])
+
+
+def _dump_for_case(adapter: TypeAdapter, items: list, case_id: str) -> list:
+    """Dump a list of extraction models to row dicts tagged with case_id."""
+    rows = adapter.dump_python(items)
+    for row in rows:
+        row["case_id"] = case_id
+    return rows
+
+
 @router.post("/cases/{case_id}/extract", response_model=ExtractionResponse)
-def extract_iocs(case_id: str, request: ExtractionRequest):
+async def extract_iocs(case_id: str, request: ExtractionRequest):
     logger.info(f"Starting IOC extraction for case {case_id} using model {request.llm_model}")
+    # Fail fast before spending minutes of LLM time on results that cannot be saved
+    if not await run_in_threadpool(case_exists, case_id):
+        logger.warning(f"Case {case_id} not found; skipping extraction")
+        raise HTTPException(status_code=404, detail="Case not found")
+
     try:
-        # Run the workflow (synchronous/blocking)
-        result = ioc_extraction_agent_workflow(
+        # The workflow awaits the LLM on the event loop; blocking DB writes go to the threadpool
+        result = await ioc_extraction_agent_workflow(
             llm_model=request.llm_model,
             case_id=case_id,
             incident_description=request.incident_description,
@@ -32,39 +55,14 @@ def extract_iocs(case_id: str, request: ExtractionRequest):
 
         logger.info(f"Workflow finished. Extracted: {len(host_iocs)} host IOCs, {len(network_iocs)} network IOCs, {len(timeline_events)} timeline events.")
 
-        # Insert results into database
-        counts = {
-            "host_iocs": 0,
-            "network_iocs": 0,
-            "timeline_events": 0
-        }
-
-        if host_iocs:
-            host_ioc_dicts = []
-            for ioc in host_iocs:
-                ioc_dict = ioc.model_dump()
-                ioc_dict["case_id"] = case_id
-                host_ioc_dicts.append(ioc_dict)
-            insert_host_iocs(host_ioc_dicts)
-            counts["host_iocs"] = len(host_iocs)
-
-        if network_iocs:
-            network_ioc_dicts = []
-            for ioc in network_iocs:
-                ioc_dict = ioc.model_dump()
-                ioc_dict["case_id"] = case_id
-                network_ioc_dicts.append(ioc_dict)
-            insert_network_iocs(network_ioc_dicts)
-            counts["network_iocs"] = len(network_iocs)
-
-        if timeline_events:
-            timeline_event_dicts = []
-            for event in timeline_events:
-                event_dict = event.model_dump()
-                event_dict["case_id"] = case_id
-                timeline_event_dicts.append(event_dict)
-            insert_timeline_events(timeline_event_dicts)
-            counts["timeline_events"] = len(timeline_events)
+        # Insert all results in one transaction; counts are the rows actually
+        # stored, so indicators already saved for the case are not counted
+        counts = await run_in_threadpool(
+            insert_extraction_results,
+            _dump_for_case(_HOST_IOC_LIST, host_iocs, case_id),
+            _dump_for_case(_NETWORK_IOC_LIST, network_iocs, case_id),
+            _dump_for_case(_TIMELINE_LIST, timeline_events, case_id),
+        )
 
         logger.info(f"Successfully saved extraction results for case {case_id}")
 
@@ -105,7 +103,7 @@ def extract_iocs(case_id: str, request: ExtractionRequest):
         logger.error(f"Error during IOC extraction for case {case_id}: {e}")
         raise HTTPException(status_code=500, detail="IOC extraction failed.") from e
 
-@router.get("/workflow/models")
+@router.get("/workflow/models", response_model=ModelListResponse)
 def get_models():
     """Lists models available on the configured OpenAI-compatible LLM server."""
     try:
@@ -11,12 +11,14 @@ for servers/models that reject ``json_schema``.
 
 import asyncio
 import logging
+import os
 from datetime import datetime
 from functools import lru_cache
 from typing import Annotated, Any, List, Literal, Optional
 
 from pydantic import BaseModel, Field, model_validator
 from pydantic_ai import Agent, NativeOutput, PromptedOutput
+from pydantic_ai.messages import ModelMessage
 from pydantic_ai.settings import ModelSettings
 
 from backend.utils.llm import build_model, get_output_mode
@@ -127,6 +129,17 @@ class NetworkIOCOutputList(BaseModel):
 TriageDecision = Literal["continue", "skip"]
 
 
+class TriageResult(BaseModel):
+    """Host and network triage decisions from a single pass over the description."""
+
+    host: TriageDecision = Field(
+        description="'continue' if host-based IOCs are likely present, else 'skip'."
+    )
+    network: TriageDecision = Field(
+        description="'continue' if network-based IOCs are likely present, else 'skip'."
+    )
+
+
 class EvaluationResult(BaseModel):
     """Quality-control verdict for one extraction branch."""
 
@@ -155,18 +168,13 @@ class EvaluationResult(BaseModel):
 # single-word-format instructions removed — Pydantic AI supplies the schema)
 # ==================================
 
-TRIAGE_HOST_INSTRUCTIONS = (
-    "You are a cybersecurity analyst triage expert. Determine if the incident "
-    "description contains any potential host-based IOCs (files, processes, registry keys, etc.).\n\n"
-    "- 'continue' if host-based IOCs are likely present.\n"
-    "- 'skip' if only network IOCs or no IOCs are present."
-)
-
-TRIAGE_NETWORK_INSTRUCTIONS = (
-    "You are a cybersecurity analyst triage expert. Determine if the incident "
-    "description contains any potential network-based IOCs (IPs, domains, URLs, etc.).\n\n"
-    "- 'continue' if network-based IOCs are likely present.\n"
-    "- 'skip' if only host-based IOCs or no IOCs are present."
+TRIAGE_INSTRUCTIONS = (
+    "You are a cybersecurity analyst triage expert. Determine which kinds of IOCs "
+    "the incident description contains, deciding host and network independently.\n\n"
+    "- `host`: 'continue' if host-based IOCs (files, processes, registry keys, etc.) "
+    "are likely present, else 'skip'.\n"
+    "- `network`: 'continue' if network-based IOCs (IPs, domains, URLs, etc.) "
+    "are likely present, else 'skip'."
 )
 
 HOST_EXTRACTION_INSTRUCTIONS = (
@@ -252,8 +260,29 @@ def evaluation_instructions(type_label: str) -> str:
 # ==================================
 
 _MODEL_SETTINGS = ModelSettings(temperature=0.2)
+# Triage and evaluation are classifications, so they decode greedily for
+# repeatable verdicts. Their output is not capped: reasoning models spend
+# completion tokens thinking before they answer.
+_CLASSIFIER_SETTINGS = ModelSettings(temperature=0.0)
 _AGENT_CACHE_SIZE = 32
 
+# Upper bound on LLM requests in flight per event loop, shared by every
+# concurrent extraction so parallel requests queue here, not on the server.
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+
+_llm_semaphore: Optional[asyncio.Semaphore] = None
+_llm_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_llm_semaphore() -> asyncio.Semaphore:
+    """Return the LLM semaphore bound to the running event loop."""
+    global _llm_semaphore, _llm_semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _llm_semaphore is None or _llm_semaphore_loop is not loop:
+        _llm_semaphore = asyncio.Semaphore(LLM_CONCURRENCY)
+        _llm_semaphore_loop = loop
+    return _llm_semaphore
+
 
 def _structured(output_type):
     """Wrap an output type in the configured structured-output mode."""
@@ -262,28 +291,34 @@ def _structured(output_type):
     return NativeOutput(output_type)
 
 
-def run_agent_sync(
+async def run_agent(
     agent: Agent,
     model_name: str,
     user_prompt: str,
     *,
     instructions: Optional[str] = None,
+    message_history: Optional[List[ModelMessage]] = None,
 ) -> Any:
-    """Run an agent with a request-scoped model/client.
+    """Run an agent with a request-scoped model on the loop's shared provider.
+
+    The model-free agent definition stays cached while the model is built
+    around each call from ``llm.get_provider()``, so its HTTP client always
+    belongs to the running event loop. Entering the model only closes that
+    client when nothing else holds it open (the API lifespan does). At most
+    ``LLM_CONCURRENCY`` calls run at once; the rest wait their turn.
 
-    Pydantic AI's OpenAI models contain an async HTTP client. The workflow is
-    synchronous and executes cached agents from several worker threads, so
-    caching a model-bound agent can reuse one async client across different
-    event loops. Build and close the model inside the event loop for each call
-    while keeping the model-free agent definition cached.
+    ``message_history`` continues an earlier run as a follow-up turn.
 
     A model already attached to an agent is retained for offline test doubles
     and explicit caller overrides.
     """
-
-    async def run():
+    async with _get_llm_semaphore():
         if agent.model is not None:
-            return await agent.run(user_prompt, instructions=instructions)
+            return await agent.run(
+                user_prompt,
+                instructions=instructions,
+                message_history=message_history,
+            )
 
         model = build_model(model_name)
         async with model:
@@ -291,32 +326,32 @@ def run_agent_sync(
                 user_prompt,
                 model=model,
                 instructions=instructions,
+                message_history=message_history,
             )
 
-    return asyncio.run(run())
-
 
-@lru_cache(maxsize=_AGENT_CACHE_SIZE)
-def get_triage_host_agent(model_name: str) -> Agent:
-    return Agent(
-        None,
-        output_type=_structured(TriageDecision),
-        instructions=TRIAGE_HOST_INSTRUCTIONS,
-        model_settings=_MODEL_SETTINGS,
-        retries=2,
-        name="triage_host",
+def run_agent_sync(
+    agent: Agent,
+    model_name: str,
+    user_prompt: str,
+    *,
+    instructions: Optional[str] = None,
+) -> Any:
+    """Blocking wrapper around :func:`run_agent` for callers without a loop."""
+    return asyncio.run(
+        run_agent(agent, model_name, user_prompt, instructions=instructions)
     )
 
 
 @lru_cache(maxsize=_AGENT_CACHE_SIZE)
-def get_triage_network_agent(model_name: str) -> Agent:
+def get_triage_agent(model_name: str) -> Agent:
     return Agent(
         None,
-        output_type=_structured(TriageDecision),
-        instructions=TRIAGE_NETWORK_INSTRUCTIONS,
-        model_settings=_MODEL_SETTINGS,
+        output_type=_structured(TriageResult),
+        instructions=TRIAGE_INSTRUCTIONS,
+        model_settings=_CLASSIFIER_SETTINGS,
         retries=2,
-        name="triage_network",
+        name="triage",
     )
 
 
@@ -362,7 +397,7 @@ def get_evaluation_agent(model_name: str, type_label: str) -> Agent:
         None,
         output_type=_structured(EvaluationResult),
         instructions=evaluation_instructions(type_label),
-        model_settings=_MODEL_SETTINGS,
+        model_settings=_CLASSIFIER_SETTINGS,
         retries=2,
         name=f"evaluate_{type_label}",
     )
@@ -2,12 +2,11 @@ import logging
 import os
 import random
 import string
+import threading
 from datetime import datetime, timezone
-from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Type
 
-import pandas as pd
 from sqlalchemy import (
     Column,
     DateTime,
@@ -16,12 +15,18 @@ from sqlalchemy import (
     String,
     Text,
     create_engine,
+    delete,
     event,
+    func,
+    insert,
+    inspect,
     select,
     text as sa_text,
     Index,
     Enum,
 )
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import declarative_base, relationship, Session, sessionmaker
 
 # ----------------------------------------------------------------------------
@@ -42,33 +47,96 @@ logger = logging.getLogger(__name__)
 Base = declarative_base()
 
 
-@lru_cache(maxsize=1)
-def get_engine(echo: bool = False):
-    """Create (or return cached) SQLAlchemy engine. Reused across calls."""
-    engine = create_engine(f"sqlite:///{DB_PATH}", echo=echo, future=True)
+_engine = None
+_sessionmaker = None
+_engine_lock = threading.Lock()
 
-    # Enforce FK constraints in SQLite
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_connection, connection_record):  # noqa: ANN001
-        try:
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
-        except Exception as e:  # pragma: no cover
-            logger.warning("Failed to set SQLite PRAGMA foreign_keys=ON: %s", e)
 
-    return engine
+def _set_sqlite_pragma(dbapi_connection, connection_record):  # noqa: ANN001
+    """
+    Enforce FK constraints in SQLite. WAL with synchronous=NORMAL only fsyncs
+    at checkpoints instead of on every commit, and lets reads run during writes.
+    """
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+    except Exception as e:  # pragma: no cover
+        logger.warning("Failed to set SQLite PRAGMAs: %s", e)
+
+
+def _init_engine() -> None:
+    """Create the process-wide engine and session factory exactly once."""
+    global _engine, _sessionmaker
+    with _engine_lock:
+        if _engine is None:
+            engine = create_engine(f"sqlite:///{DB_PATH}", future=True)
+            event.listen(engine, "connect", _set_sqlite_pragma)
+            _sessionmaker = sessionmaker(bind=engine, expire_on_commit=False, class_=Session)
+            _engine = engine
+
+
+def get_engine():
+    """Return the process-wide SQLAlchemy engine, creating it on first use."""
+    if _engine is None:
+        _init_engine()
+    return _engine
 
 
-@lru_cache(maxsize=1)
 def get_sessionmaker():
-    return sessionmaker(bind=get_engine(), expire_on_commit=False, class_=Session)
+    """Return the process-wide session factory, creating it on first use."""
+    if _sessionmaker is None:
+        _init_engine()
+    return _sessionmaker
 
 
 def init_db() -> None:
-    """Create tables if they don't exist."""
+    """Create tables if they don't exist. Called once at application startup."""
     engine = get_engine()
     Base.metadata.create_all(engine)
+    _upgrade_ioc_indexes(engine)
+
+
+def _upgrade_ioc_indexes(engine) -> None:
+    """
+    Bring the indexes of existing IOC tables in line with the models, since
+    create_all skips tables that already exist. Older databases have a
+    globally unique indicator_id index, which rejects an ID reused by another
+    case, and lack the per-case dedup index. Before that index is added,
+    duplicate indicators already stored for a case are removed, keeping the
+    earliest row.
+    """
+    inspector = inspect(engine)
+    for model_class, dedup_key in _DEDUP_KEYS.items():
+        table = model_class.__table__
+        existing = {ix["name"]: ix for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            current = existing.get(index.name)
+            if current is not None and (
+                bool(current["unique"]) == bool(index.unique)
+                and current["column_names"] == [column.name for column in index.columns]
+            ):
+                continue
+            with engine.begin() as conn:
+                if current is not None:
+                    index.drop(conn)
+                if index.unique:
+                    keep = select(func.min(table.c.id)).group_by(
+                        *(table.c[column] for column in dedup_key)
+                    )
+                    stale = delete(table).where(table.c.id.not_in(keep))
+                    removed = conn.execute(stale).rowcount
+                    if removed:
+                        logger.warning(
+                            "Removed %d duplicate rows from %s before adding %s",
+                            removed,
+                            table.name,
+                            index.name,
+                        )
+                index.create(conn)
+            logger.info("Upgraded index %s on %s", index.name, table.name)
 
 
 # ----------------------------------------------------------------------------
@@ -138,7 +206,7 @@ class HostIOC(Base):
     date_added = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     source = Column(String(128), nullable=False)
     status = Column(String(64), nullable=False)
-    indicator_id = Column(String(256), nullable=False, unique=True, index=True)
+    indicator_id = Column(String(256), nullable=False, index=True)
     indicator_type = Column(String(64), nullable=False)
     indicator = Column(String(512), nullable=False)
     full_path = Column(String(1024), nullable=True)
@@ -153,6 +221,7 @@ class HostIOC(Base):
 
     __table_args__ = (
         Index("ix_hostioc_case_type", "case_id", "indicator_type"),
+        Index("uq_hostioc_case_indicator", "case_id", "indicator_type", "indicator", unique=True),
     )
 
 
@@ -166,7 +235,7 @@ class NetworkIOC(Base):
     date_added = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     source = Column(String(128), nullable=False)
     status = Column(String(64), nullable=False)
-    indicator_id = Column(String(256), nullable=False, unique=True, index=True)
+    indicator_id = Column(String(256), nullable=False, index=True)
     indicator_type = Column(String(64), nullable=False)
     indicator = Column(String(512), nullable=False)
     initial_lead = Column(String(512))
@@ -179,6 +248,7 @@ class NetworkIOC(Base):
 
     __table_args__ = (
         Index("ix_networkioc_case_type", "case_id", "indicator_type"),
+        Index("uq_networkioc_case_indicator", "case_id", "indicator_type", "indicator", unique=True),
     )
 
 
@@ -187,14 +257,15 @@ class NetworkIOC(Base):
 # ----------------------------------------------------------------------------
 
 
-def generate_case_id(existing_ids) -> str:
-    """Generate a unique human-readable case ID. Guard against rare collisions."""
-    while True:
-        numeric_part = f"{random.randint(0, 9999):04d}"
-        alpha_part = "".join(random.choices(string.ascii_uppercase, k=2))
-        candidate = f"CAS-{numeric_part}-{alpha_part}"
-        if candidate not in existing_ids:
-            return candidate
+# Random case IDs can collide; the UNIQUE constraint on cases.case_id catches it
+CASE_ID_ATTEMPTS = 5
+
+
+def generate_case_id() -> str:
+    """Generate a random human-readable case ID candidate."""
+    numeric_part = f"{random.randint(0, 9999):04d}"
+    alpha_part = "".join(random.choices(string.ascii_uppercase, k=2))
+    return f"CAS-{numeric_part}-{alpha_part}"
 
 
 # ----------------------------------------------------------------------------
@@ -202,34 +273,98 @@ def generate_case_id(existing_ids) -> str:
 # ----------------------------------------------------------------------------
 
 
-def load_database() -> Dict[str, pd.DataFrame]:
+def load_rows(table_name: str) -> List[Dict]:
+    """
+    Load every row of one table as plain dicts.
+    SQL NULL comes back as None, so no NaN clean-up is needed.
     """
-    Ensure DB exists and load all tables into DataFrames.
+    table = Base.metadata.tables[table_name]
+    with get_engine().connect() as connection:
+        return [dict(row) for row in connection.execute(select(table)).mappings()]
+
+
+def load_database() -> Dict[str, List[Dict]]:
+    """
+    Load all tables as lists of row dicts.
     Returns a dict keyed by table name.
     """
-    init_db()
-    engine = get_engine()
-    dataframes: Dict[str, pd.DataFrame] = {}
+    tables: Dict[str, List[Dict]] = {}
 
-    for table_name, table in Base.metadata.tables.items():
+    for table_name in Base.metadata.tables:
         try:
-            stmt = select(table)
-            df = pd.read_sql(stmt, engine)
-            dataframes[table_name] = df
-            logger.debug("Loaded table '%s' (%d rows)", table_name, len(df))
+            rows = load_rows(table_name)
+            tables[table_name] = rows
+            logger.debug("Loaded table '%s' (%d rows)", table_name, len(rows))
         except Exception as e:
             logger.error("Error loading table '%s': %s", table_name, e)
-            dataframes[table_name] = pd.DataFrame()
+            tables[table_name] = []
+
+    return tables
 
-    return dataframes
 
+def _fetch_rows(session: Session, stmt) -> List[Dict]:
+    """Execute a Core select and return its rows as plain dicts."""
+    return [dict(row) for row in session.execute(stmt).mappings()]
 
-def create_case(case_name: str) -> str:
+
+def get_all_cases() -> List[Dict]:
+    """Return every case as a dict, in creation order."""
+    SessionLocal = get_sessionmaker()
+    cases = Case.__table__
+    with SessionLocal() as session:
+        return _fetch_rows(session, select(cases).order_by(cases.c.id))
+
+
+def get_case_by_id(case_id: str) -> Optional[Dict]:
+    """Return a single case as a dict, or None if it does not exist."""
+    SessionLocal = get_sessionmaker()
+    cases = Case.__table__
+    with SessionLocal() as session:
+        rows = _fetch_rows(session, select(cases).where(cases.c.case_id == case_id))
+    return rows[0] if rows else None
+
+
+def case_exists(case_id: str) -> bool:
+    """Return True if a case with this case_id exists."""
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as session:
+        return session.scalar(select(Case.id).where(Case.case_id == case_id)) is not None
+
+
+def get_case_artifacts(case_id: str) -> Dict[str, List[Dict]]:
     """
-    Create a new case and return its case_id.
+    Return the host IOCs, network IOCs and timeline events of one case.
+    Each query is served by the table's case_id index; timeline events
+    come back in chronological order.
+    """
+    SessionLocal = get_sessionmaker()
+    host_ioc = HostIOC.__table__
+    network_ioc = NetworkIOC.__table__
+    timeline = Timeline.__table__
+    with SessionLocal() as session:
+        return {
+            "host_iocs": _fetch_rows(
+                session,
+                select(host_ioc).where(host_ioc.c.case_id == case_id).order_by(host_ioc.c.id),
+            ),
+            "network_iocs": _fetch_rows(
+                session,
+                select(network_ioc).where(network_ioc.c.case_id == case_id).order_by(network_ioc.c.id),
+            ),
+            "timeline_events": _fetch_rows(
+                session,
+                select(timeline)
+                .where(timeline.c.case_id == case_id)
+                .order_by(timeline.c.timestamp_utc, timeline.c.id),
+            ),
+        }
+
+
+def create_case(case_name: str) -> Case:
+    """
+    Create a new case and return it. Attributes stay readable after the
+    session closes (expire_on_commit=False), so no re-fetch is needed.
     """
-    init_db()
-    engine = get_engine()
     SessionLocal = get_sessionmaker()
 
     cleaned = (case_name or "").strip()
@@ -237,27 +372,33 @@ def create_case(case_name: str) -> str:
         raise ValueError("Case name cannot be empty")
 
     with SessionLocal() as session:
-        existing_ids = {row.case_id for row in session.query(Case.case_id).all()}
-        case_id = generate_case_id(existing_ids)
-        now = datetime.now(timezone.utc)
-        new_case = Case(
-            case_id=case_id,
-            name=cleaned,
-            status="Open",
-            created_at=now,
-            updated_at=now,
-        )
-        session.add(new_case)
-        session.commit()
-        logger.info("Created case %s (%s)", case_id, cleaned)
-        return case_id
+        for _ in range(CASE_ID_ATTEMPTS):
+            case_id = generate_case_id()
+            now = datetime.now(timezone.utc)
+            new_case = Case(
+                case_id=case_id,
+                name=cleaned,
+                status="Open",
+                created_at=now,
+                updated_at=now,
+            )
+            session.add(new_case)
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                logger.warning("Case ID %s already exists; retrying with a new one", case_id)
+                continue
+            logger.info("Created case %s (%s)", case_id, cleaned)
+            return new_case
+
+    raise RuntimeError(f"Could not allocate a unique case ID after {CASE_ID_ATTEMPTS} attempts")
 
 
 def delete_case(case_id: str) -> bool:
     """
     Delete a case and all its associated data.
     """
-    init_db()
     SessionLocal = get_sessionmaker()
     with SessionLocal() as session:
         case_to_delete = session.query(Case).filter(Case.case_id == case_id).first()
@@ -270,7 +411,36 @@ def delete_case(case_id: str) -> bool:
             logger.warning(f"Case {case_id} not found for deletion.")
             return False
 
-def insert_iocs(ioc_objects: List[Dict], model_class: Type[Base]) -> bool:
+# An indicator is stored once per case. Indicator IDs are freshly stamped on
+# every extraction, so identity is the indicator itself: re-inserting the same
+# (case_id, indicator_type, indicator) is skipped rather than failing the batch.
+_DEDUP_KEYS = {
+    HostIOC: ("case_id", "indicator_type", "indicator"),
+    NetworkIOC: ("case_id", "indicator_type", "indicator"),
+}
+
+
+def _bulk_insert(model_class: Type[Base]):
+    """
+    Build the bulk INSERT for a table. On SQLite, IOC rows that repeat an
+    indicator already stored for the case are skipped instead of failing and
+    rolling back the whole batch; any other constraint violation still raises.
+    """
+    table = model_class.__table__
+    dedup_key = _DEDUP_KEYS.get(model_class)
+    if dedup_key and get_database_dialect() == "sqlite":
+        return sqlite_insert(table).on_conflict_do_nothing(index_elements=list(dedup_key))
+    return insert(table)
+
+
+def _insert_rows(session: Session, model_class: Type[Base], rows: List[Dict]) -> int:
+    """Run the bulk INSERT for rows and return how many were actually stored."""
+    if not rows:
+        return 0
+    return session.execute(_bulk_insert(model_class), rows).rowcount
+
+
+def insert_iocs(ioc_objects: List[Dict], model_class: Type[Base]) -> int:
     """
     Insert a list of IOC objects into the database.
 
@@ -279,32 +449,69 @@ def insert_iocs(ioc_objects: List[Dict], model_class: Type[Base]) -> bool:
         model_class: The SQLAlchemy model class to use for insertion.
 
     Returns:
-        True on success, False on error.
+        The number of rows stored, excluding skipped duplicates.
+
+    Raises:
+        SQLAlchemyError: If the insert fails; nothing is saved.
     """
-    init_db()
     SessionLocal = get_sessionmaker()
     with SessionLocal() as session:
         try:
-            for ioc_data in ioc_objects:
-                db_ioc = model_class(**ioc_data)
-                session.add(db_ioc)
+            # One Core executemany INSERT in a single transaction, bypassing the ORM unit of work
+            inserted = _insert_rows(session, model_class, ioc_objects)
             session.commit()
-            logger.info(f"Successfully inserted {len(ioc_objects)} records into {model_class.__tablename__}.")
-            return True
         except Exception as e:
             session.rollback()
             logger.error(f"Failed to insert IOCs into {model_class.__tablename__}: {e}")
-            return False
+            raise
+    logger.info(
+        f"Inserted {inserted} of {len(ioc_objects)} records into {model_class.__tablename__}."
+    )
+    return inserted
 
-def insert_host_iocs(ioc_objects: List[Dict]) -> bool:
+def insert_host_iocs(ioc_objects: List[Dict]) -> int:
     return insert_iocs(ioc_objects, HostIOC)
 
-def insert_network_iocs(ioc_objects: List[Dict]) -> bool:
+def insert_network_iocs(ioc_objects: List[Dict]) -> int:
     return insert_iocs(ioc_objects, NetworkIOC)
 
-def insert_timeline_events(ioc_objects: List[Dict]) -> bool:
+def insert_timeline_events(ioc_objects: List[Dict]) -> int:
     return insert_iocs(ioc_objects, Timeline)
 
+def insert_extraction_results(
+    host_iocs: List[Dict],
+    network_iocs: List[Dict],
+    timeline_events: List[Dict],
+) -> Dict[str, int]:
+    """
+    Insert the host IOCs, network IOCs and timeline events of one extraction
+    in a single transaction, so the run is saved with one commit or not at all.
+
+    Returns:
+        The number of rows stored per kind, excluding skipped duplicates.
+
+    Raises:
+        SQLAlchemyError: If any insert fails; nothing is saved.
+    """
+    SessionLocal = get_sessionmaker()
+    with SessionLocal() as session:
+        try:
+            counts = {
+                "host_iocs": _insert_rows(session, HostIOC, host_iocs),
+                "network_iocs": _insert_rows(session, NetworkIOC, network_iocs),
+                "timeline_events": _insert_rows(session, Timeline, timeline_events),
+            }
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Failed to insert extraction results: {e}")
+            raise
+    logger.info(
+        f"Inserted {counts['host_iocs']} host IOCs, {counts['network_iocs']} network IOCs "
+        f"and {counts['timeline_events']} timeline events."
+    )
+    return counts
+
 def get_database_dialect() -> str:
     """Return the engine dialect name (e.g., 'sqlite')."""
     return get_engine().dialect.name
\ No newline at end of file
@@ -3,15 +3,19 @@
 Graph orchestration (triage → parallel host/network/timeline extraction fan-out)
 lives here; every LLM call is delegated to the Pydantic AI agents in
 ``backend.utils.agents``, which work against any OpenAI-v1-compatible server.
+The graph runs on the caller's event loop: branches overlap their LLM round
+trips, bounded by ``agents.LLM_CONCURRENCY``.
 """
 
 import logging
 import uuid
-from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List, Optional, TypedDict
 
 from langgraph.graph import END, START, StateGraph
+from pydantic_core import to_json
 from pydantic_ai import Agent
+from pydantic_ai.exceptions import UnexpectedModelBehavior
+from pydantic_ai.messages import ModelMessage
 
 from backend.utils import agents
 from backend.utils.agents import (
@@ -23,6 +27,7 @@ from backend.utils.agents import (
     TimelineOutputFormat,
     TimelineOutputList,
     TriageDecision,
+    TriageResult,
 )
 
 # Re-exports for backward compatibility (these models used to be defined here).
@@ -35,6 +40,7 @@ __all__ = [
     "TimelineOutputFormat",
     "TimelineOutputList",
     "TriageDecision",
+    "TriageResult",
     "WorkflowState",
     "ioc_extraction_agent_workflow",
 ]
@@ -61,7 +67,7 @@ class WorkflowState(TypedDict):
 # EVALUATION HELPER
 # ==================================
 
-def _evaluate(
+async def _evaluate(
     model: str,
     extracted: List[Any],
     type_label: str,
@@ -75,8 +81,8 @@ def _evaluate(
     if not extracted:
         return None
 
-    items_str = "\n".join(item.model_dump_json() for item in extracted)
-    result = agents.run_agent_sync(
+    items_str = to_json(extracted).decode()
+    result = await agents.run_agent(
         agents.get_evaluation_agent(model, type_label),
         model,
         f"Original incident description:\n{original_description}\n\n"
@@ -94,7 +100,7 @@ def _evaluate(
 # EXTRACTION LOOP HELPER
 # ==================================
 
-def _run_extraction_loop(
+async def _run_extraction_loop(
     model: str,
     extraction_agent: Agent,
     description: str,
@@ -107,28 +113,35 @@ def _run_extraction_loop(
     internally; it raises only after its own retries are exhausted, in which
     case a generic validation-failure feedback line preserves the max-attempts
     behaviour.
+
+    Refinements continue the conversation of the latest valid extraction with
+    the feedback as a new user turn, so the instructions and description stay
+    a byte-identical prefix the server can serve from its prompt cache.
     """
     feedback: Optional[str] = None
     last_extraction: List[Any] = []
+    history: Optional[List[ModelMessage]] = None
 
     for attempt in range(max_attempts):
         logger.info(f"{type_label} extraction attempt {attempt + 1}/{max_attempts}")
 
-        instructions = None
+        prompt = description
         if feedback:
-            instructions = (
+            refinement = (
                 "Your previous attempt had issues. Please improve based on this feedback:\n"
                 f"{feedback}"
             )
+            prompt = refinement if history is not None else f"{description}\n\n{refinement}"
 
         try:
-            result = agents.run_agent_sync(
+            result = await agents.run_agent(
                 extraction_agent,
                 model,
-                description,
-                instructions=instructions,
+                prompt,
+                message_history=history,
             )
             last_extraction = result.output.iocs
+            history = result.all_messages()
         except Exception as e:
             logger.error(f"{type_label} extraction attempt {attempt + 1} failed: {e}")
             feedback = (
@@ -138,7 +151,7 @@ def _run_extraction_loop(
             continue
 
         try:
-            evaluation = _evaluate(model, last_extraction, type_label, description)
+            evaluation = await _evaluate(model, last_extraction, type_label, description)
         except Exception as e:
             # A schema-valid extraction is still useful if the optional quality
             # review exhausts its own retries or the provider fails mid-review.
@@ -167,78 +180,77 @@ def _run_extraction_loop(
 # GRAPH NODES
 # ==================================
 
-def run_triage(state: WorkflowState) -> dict:
-    """Runs host and network triage in parallel."""
+def _stamp_indicator_ids(iocs: List[Any], prefix: str) -> None:
+    """Assigns unique IDs from one UUID per extraction plus a running index."""
+    batch_id = uuid.uuid4()
+    for index, ioc in enumerate(iocs):
+        ioc.indicator_id = f"{prefix}-{batch_id}-{index}"
+
+
+async def run_triage(state: WorkflowState) -> dict:
+    """Decides host and network triage in one call over the description."""
     logger.info(f"[triage] Starting for case {state['case_id']}")
     model = state["llm_model"]
-    description = state["incident_description"]
-
-    with ThreadPoolExecutor(max_workers=2) as executor:
-        host_future = executor.submit(
-            agents.run_agent_sync,
-            agents.get_triage_host_agent(model),
-            model,
-            description,
-        )
-        network_future = executor.submit(
-            agents.run_agent_sync,
-            agents.get_triage_network_agent(model),
-            model,
-            description,
+
+    try:
+        result = await agents.run_agent(
+            agents.get_triage_agent(model), model, state["incident_description"]
         )
-        host_decision = host_future.result().output
-        network_decision = network_future.result().output
+        triage = result.output
+    except UnexpectedModelBehavior as e:
+        # Triage only prunes work; an unusable reply runs every extraction
+        # instead. Provider errors propagate so the request fails as a 502.
+        logger.error(f"[triage] Invalid output, continuing with all extractions: {e}")
+        return {"host_triage": "continue", "network_triage": "continue"}
 
-    logger.info(f"Triage decisions — host: '{host_decision}', network: '{network_decision}'")
-    return {"host_triage": host_decision, "network_triage": network_decision}
+    logger.info(f"Triage decisions — host: '{triage.host}', network: '{triage.network}'")
+    return {"host_triage": triage.host, "network_triage": triage.network}
 
 
-def run_host_extraction(state: WorkflowState) -> dict:
+async def run_host_extraction(state: WorkflowState) -> dict:
     """Extracts host IOCs. Skips if triage says so."""
     if state.get("host_triage") != "continue":
         logger.info("[extract_host] Skipping — triage decision was not 'continue'.")
         return {"host_ioc_objects": []}
 
     logger.info("[extract_host] Starting extraction.")
-    iocs = _run_extraction_loop(
+    iocs = await _run_extraction_loop(
         state["llm_model"],
         agents.get_host_extraction_agent(state["llm_model"]),
         state["incident_description"],
         "host",
     )
 
-    for ioc in iocs:
-        ioc.indicator_id = f"H-{uuid.uuid4()}"
+    _stamp_indicator_ids(iocs, "H")
 
     logger.info(f"[extract_host] Extracted {len(iocs)} host IOC(s).")
     return {"host_ioc_objects": iocs}
 
 
-def run_network_extraction(state: WorkflowState) -> dict:
+async def run_network_extraction(state: WorkflowState) -> dict:
     """Extracts network IOCs. Skips if triage says so."""
     if state.get("network_triage") != "continue":
         logger.info("[extract_network] Skipping — triage decision was not 'continue'.")
         return {"network_ioc_objects": []}
 
     logger.info("[extract_network] Starting extraction.")
-    iocs = _run_extraction_loop(
+    iocs = await _run_extraction_loop(
         state["llm_model"],
         agents.get_network_extraction_agent(state["llm_model"]),
         state["incident_description"],
         "network",
     )
 
-    for ioc in iocs:
-        ioc.indicator_id = f"N-{uuid.uuid4()}"
+    _stamp_indicator_ids(iocs, "N")
 
     logger.info(f"[extract_network] Extracted {len(iocs)} network IOC(s).")
     return {"network_ioc_objects": iocs}
 
 
-def run_timeline_extraction(state: WorkflowState) -> dict:
+async def run_timeline_extraction(state: WorkflowState) -> dict:
     """Extracts timeline events. Always runs."""
     logger.info("[extract_timeline] Starting extraction.")
-    events = _run_extraction_loop(
+    events = await _run_extraction_loop(
         state["llm_model"],
         agents.get_timeline_extraction_agent(state["llm_model"]),
         state["incident_description"],
@@ -283,7 +295,7 @@ _workflow = _build_workflow()
 # PUBLIC ENTRYPOINT
 # ==================================
 
-def ioc_extraction_agent_workflow(
+async def ioc_extraction_agent_workflow(
     llm_model: str,
     case_id: str,
     incident_description: str,
@@ -301,7 +313,7 @@ def ioc_extraction_agent_workflow(
         "timeline_objects": [],
     }
 
-    final_state = _workflow.invoke(initial_state)
+    final_state = await _workflow.ainvoke(initial_state)
 
     logger.info(
         f"Workflow complete for case {case_id} — "
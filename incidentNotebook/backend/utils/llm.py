@@ -12,8 +12,11 @@ configuration:
   or ``prompted`` (schema injected into the prompt) structured-output mode.
 """
 
+import asyncio
 import logging
 import os
+import time
+from typing import Optional
 from urllib.parse import urlparse
 
 from dotenv import load_dotenv
@@ -29,6 +32,11 @@ LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434/v1")
 LLM_API_KEY = os.getenv("LLM_API_KEY", "local")
 LLM_OUTPUT_MODE = os.getenv("LLM_OUTPUT_MODE", "native").strip().lower()
 
+# The model list backs a UI dropdown that is re-fetched on every page load;
+# serve it from memory for a short while instead of hitting the server each time.
+MODELS_CACHE_TTL_SECONDS = 60.0
+_models_cache: Optional[tuple[float, list[str]]] = None
+
 if LLM_OUTPUT_MODE not in ("native", "prompted"):
     logger.warning(
         "Unknown LLM_OUTPUT_MODE %r — falling back to 'native'.", LLM_OUTPUT_MODE
@@ -50,13 +58,34 @@ def _warn_if_base_url_missing_v1() -> None:
 _warn_if_base_url_missing_v1()
 
 
+# Shared provider (and its HTTP connection pool), rebuilt only when the event loop changes
+_provider: Optional[OpenAIProvider] = None
+_provider_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_provider() -> OpenAIProvider:
+    """Return the OpenAI provider bound to the running event loop.
+
+    Its async HTTP client cannot outlive the loop it was created on, so a new
+    provider is built when the loop changes (e.g. per ``asyncio.run``). Within
+    the API server every request shares one provider and keeps its
+    connections alive for as long as the app lifespan holds it open.
+    """
+    global _provider, _provider_loop
+    loop = asyncio.get_running_loop()
+    if _provider is None or _provider_loop is not loop:
+        _provider = OpenAIProvider(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
+        _provider_loop = loop
+    return _provider
+
+
 def build_model(model_name: str) -> OpenAIChatModel:
     """Build a chat model for the configured OpenAI-v1-compatible server.
 
     This is the only place in the codebase that constructs an LLM client/model.
+    Must be called from within an event loop; see ``get_provider``.
     """
-    provider = OpenAIProvider(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
-    return OpenAIChatModel(model_name, provider=provider)
+    return OpenAIChatModel(model_name, provider=get_provider())
 
 
 def get_output_mode() -> str:
@@ -69,8 +98,18 @@ def list_models() -> list[str]:
 
     Short timeout and no retries: this powers a UI dropdown, so an unreachable
     server must fail fast (and surface as a clear 503) rather than hang.
+    Successful results are cached for ``MODELS_CACHE_TTL_SECONDS``; failures
+    are not cached.
     """
+    global _models_cache
+    now = time.monotonic()
+    if _models_cache is not None and now - _models_cache[0] < MODELS_CACHE_TTL_SECONDS:
+        return list(_models_cache[1])
+
     with OpenAI(
         base_url=LLM_BASE_URL, api_key=LLM_API_KEY, timeout=5.0, max_retries=0
     ) as client:
-        return [model.id for model in client.models.list()]
+        models = [model.id for model in client.models.list()]
+
+    _models_cache = (now, models)
+    return list(models)
@@ -1,18 +1,48 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pythonjsonlogger import jsonlogger
 
+LOG_MAX_BYTES = 10_000_000
+LOG_BACKUP_COUNT = 5
+
+_listener = None
+
+def _stop_listener():
+    """Flush queued records on interpreter exit."""
+    if _listener is not None:
+        _listener.stop()
+
+atexit.register(_stop_listener)
+
 def setup_logging(log_filename="incident_notebook.log"):
-    """Set up logging for the application."""
+    """Set up logging for the application.
+
+    Records are handed to a queue on the calling thread and written to the
+    log file and console by a background listener, so logging never blocks
+    the event loop on disk or terminal I/O.
+    """
+    global _listener
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
-    # Remove all handlers associated with the root logger object.
+    # Remove all handlers associated with the root logger object, and retire
+    # any previous listener so repeated setup never duplicates output.
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+    _stop_listener()
+    if _listener is not None:
+        for handler in _listener.handlers:
+            handler.close()
 
-    # Create a file handler for JSON logs
-    log_handler = logging.FileHandler(f"backend/logs/backend.log")
+    # Create a size-capped, rotating file handler for JSON logs
+    log_handler = logging.handlers.RotatingFileHandler(
+        "backend/logs/backend.log",
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+    )
     formatter = jsonlogger.JsonFormatter("%(asctime)s %(name)s %(levelname)s %(message)s")
     log_handler.setFormatter(formatter)
 
@@ -21,5 +51,8 @@ def setup_logging(log_filename="incident_notebook.log"):
     stream_formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     stream_handler.setFormatter(stream_formatter)
 
-    logger.addHandler(log_handler)
-    logger.addHandler(stream_handler)
\ No newline at end of file
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, log_handler, stream_handler)
+    _listener.start()
@@ -83,18 +83,6 @@ export default function TimelineView({ events }: { events: TimelineEvent[] }) {
     );
   }
 
-  // Sort events by timestamp
-  const sorted = [...events].sort((a, b) => {
-    try {
-      return (
-        new Date(a.timestamp_utc).getTime() -
-        new Date(b.timestamp_utc).getTime()
-      );
-    } catch {
-      return 0;
-    }
-  });
-
   return (
     <div className="animate-fade-in">
       <div className="flex items-center gap-2 mb-6">
@@ -112,9 +100,10 @@ export default function TimelineView({ events }: { events: TimelineEvent[] }) {
         <div className="absolute left-[88px] top-3 bottom-3 w-px bg-border" />
 
         <div className="space-y-0">
-          {sorted.map((event, idx) => {
+          {/* The API returns events already in chronological order */}
+          {events.map((event, idx) => {
             const ts = formatTimestamp(event.timestamp_utc);
-            const isLast = idx === sorted.length - 1;
+            const isLast = idx === events.length - 1;
 
             return (
               <div
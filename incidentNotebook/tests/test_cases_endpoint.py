@@ -0,0 +1,194 @@
+"""Tests for the /cases endpoints against a throwaway SQLite database.
+
+Run with: ``uv run pytest tests/test_cases_endpoint.py``
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text as sa_text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.main import app
+from backend.utils import database
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", future=True)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, class_=Session)
+    monkeypatch.setattr(database, "get_engine", lambda: engine)
+    monkeypatch.setattr(database, "get_sessionmaker", lambda: SessionLocal)
+    database.init_db()
+    yield TestClient(app)
+    engine.dispose()
+
+
+def timeline_event(case_id: str, hour: int, activity: str) -> dict:
+    return {
+        "case_id": case_id,
+        "submitted_by": "analyst",
+        "status_tag": "Confirmed",
+        "system_name": "WS01",
+        "timestamp_utc": datetime(2024, 3, 1, hour, tzinfo=timezone.utc),
+        "timestamp_type": "Execution Time",
+        "activity": activity,
+        "evidence_source": "Sysmon",
+    }
+
+
+def test_create_and_fetch_case(client):
+    created = client.post("/cases", json={"name": "Ransomware"})
+
+    assert created.status_code == 200
+    case = created.json()
+    assert database.case_exists(case["case_id"]) is True
+    assert case["name"] == "Ransomware"
+    assert case["status"] == "Open"
+
+    assert client.get(f"/cases/{case['case_id']}").json() == case
+    assert client.get("/cases").json() == [case]
+    assert [row["case_id"] for row in database.load_database()["cases"]] == [case["case_id"]]
+
+
+def test_unknown_case_is_404(client):
+    assert client.get("/cases/CAS-0000-XX").status_code == 404
+    assert database.case_exists("CAS-0000-XX") is False
+
+
+def test_case_data_is_scoped_to_case_and_chronological(client):
+    first = client.post("/cases", json={"name": "First"}).json()["case_id"]
+    other = client.post("/cases", json={"name": "Other"}).json()["case_id"]
+    database.insert_timeline_events(
+        [
+            timeline_event(first, 14, "exfiltration"),
+            timeline_event(other, 12, "unrelated"),
+            timeline_event(first, 9, "initial access"),
+        ]
+    )
+
+    data = client.get(f"/cases/{first}/data").json()
+
+    assert [event["activity"] for event in data["timeline_events"]] == [
+        "initial access",
+        "exfiltration",
+    ]
+    # Only the API fields are returned, not DB bookkeeping columns
+    assert "case_id" not in data["timeline_events"][0]
+    assert data["timeline_events"][0]["timestamp_utc"].startswith("2024-03-01T09:00:00")
+    assert data["host_iocs"] == []
+    assert data["network_iocs"] == []
+
+
+def test_create_case_retries_on_case_id_collision(client, monkeypatch):
+    candidates = iter(["CAS-0001-AA", "CAS-0001-AA", "CAS-0002-BB"])
+    monkeypatch.setattr(database, "generate_case_id", lambda: next(candidates))
+
+    assert database.create_case("First").case_id == "CAS-0001-AA"
+    assert database.create_case("Second").case_id == "CAS-0002-BB"
+    assert [case["name"] for case in client.get("/cases").json()] == ["First", "Second"]
+
+
+def test_extraction_results_are_saved_atomically(client):
+    case_id = client.post("/cases", json={"name": "Atomic"}).json()["case_id"]
+    host_ioc = {
+        "case_id": case_id,
+        "submitted_by": "analyst",
+        "source": "EDR",
+        "status": "Confirmed",
+        "indicator_id": "H-1",
+        "indicator_type": "file",
+        "indicator": "evil.exe",
+    }
+    broken_event = {**timeline_event(case_id, 9, "initial access"), "activity": None}
+
+    with pytest.raises(IntegrityError):
+        database.insert_extraction_results([host_ioc], [], [broken_event])
+    assert client.get(f"/cases/{case_id}/data").json()["host_iocs"] == []
+
+    database.insert_extraction_results([host_ioc], [], [])
+    assert len(client.get(f"/cases/{case_id}/data").json()["host_iocs"]) == 1
+
+
+def test_duplicate_indicators_are_skipped_not_fatal(client):
+    case_id = client.post("/cases", json={"name": "Rerun"}).json()["case_id"]
+    first = {
+        "case_id": case_id,
+        "submitted_by": "analyst",
+        "source": "EDR",
+        "status": "Confirmed",
+        "indicator_id": "H-1",
+        "indicator_type": "file",
+        "indicator": "evil.exe",
+    }
+    # A re-run stamps fresh IDs, but evil.exe is still the same indicator
+    rerun = {**first, "indicator_id": "H-9"}
+    second = {**first, "indicator_id": "H-2", "indicator": "evil.dll"}
+
+    assert database.insert_host_iocs([first]) == 1
+    assert database.insert_host_iocs([rerun, second]) == 1
+
+    host_iocs = client.get(f"/cases/{case_id}/data").json()["host_iocs"]
+    assert [ioc["indicator_id"] for ioc in host_iocs] == ["H-1", "H-2"]
+
+
+def test_indicators_are_unique_per_case(client):
+    first = client.post("/cases", json={"name": "First"}).json()["case_id"]
+    other = client.post("/cases", json={"name": "Other"}).json()["case_id"]
+    host_ioc = {
+        "submitted_by": "analyst",
+        "source": "EDR",
+        "status": "Confirmed",
+        "indicator_id": "H-1",
+        "indicator_type": "file",
+        "indicator": "evil.exe",
+    }
+    event = timeline_event(first, 9, "initial access")
+
+    counts = database.insert_extraction_results(
+        [
+            {**host_ioc, "case_id": first},
+            {**host_ioc, "case_id": first, "indicator_id": "H-2"},
+            {**host_ioc, "case_id": first, "indicator_id": "H-3", "indicator_type": "process"},
+        ],
+        [],
+        [event],
+    )
+    assert counts == {"host_iocs": 2, "network_iocs": 0, "timeline_events": 1}
+
+    # The same indicator, even under the same ID, is still stored for another case
+    counts = database.insert_extraction_results([{**host_ioc, "case_id": other}], [], [])
+    assert counts["host_iocs"] == 1
+    assert len(client.get(f"/cases/{other}/data").json()["host_iocs"]) == 1
+
+
+def test_init_db_upgrades_indexes_of_older_databases(client):
+    engine = database.get_engine()
+    first = client.post("/cases", json={"name": "First"}).json()["case_id"]
+    other = client.post("/cases", json={"name": "Other"}).json()["case_id"]
+    host_ioc = {
+        "case_id": first,
+        "submitted_by": "analyst",
+        "source": "EDR",
+        "status": "Confirmed",
+        "indicator_type": "file",
+        "indicator": "evil.exe",
+    }
+    # Recreate the old schema: a globally unique indicator_id and no dedup index,
+    # with the same indicator stored twice by two extraction runs
+    with engine.begin() as conn:
+        conn.execute(sa_text("DROP INDEX uq_hostioc_case_indicator"))
+        conn.execute(sa_text("DROP INDEX ix_host_ioc_indicator_id"))
+        conn.execute(sa_text("CREATE UNIQUE INDEX ix_host_ioc_indicator_id ON host_ioc (indicator_id)"))
+        conn.execute(
+            database.HostIOC.__table__.insert(),
+            [{**host_ioc, "indicator_id": "H-1"}, {**host_ioc, "indicator_id": "H-2"}],
+        )
+
+    database.init_db()
+
+    host_iocs = client.get(f"/cases/{first}/data").json()["host_iocs"]
+    assert [ioc["indicator_id"] for ioc in host_iocs] == ["H-1"]
+    assert database.insert_host_iocs([{**host_ioc, "case_id": other, "indicator_id": "H-1"}]) == 1
@@ -3,19 +3,23 @@
 Run with: ``uv run pytest tests/test_models_endpoint.py``
 """
 
+import asyncio
 from types import SimpleNamespace
 
 import pytest
 from fastapi.testclient import TestClient
 from pydantic_ai.exceptions import ModelAPIError, ModelHTTPError
+from pydantic_ai.models.function import FunctionModel
 
 from backend.main import app
 from backend.routers import workflow
-from backend.utils import llm
+from backend.utils import agents, llm
+from backend.utils.agents import HostIOCOutputFormat
 
 
 @pytest.fixture
-def client():
+def client(monkeypatch):
+    monkeypatch.setattr(workflow, "case_exists", lambda case_id: True)
     return TestClient(app)
 
 
@@ -60,13 +64,57 @@ def test_list_models_closes_client(monkeypatch):
 
     fake_client = FakeOpenAI()
     monkeypatch.setattr(llm, "OpenAI", lambda **kwargs: fake_client)
+    monkeypatch.setattr(llm, "_models_cache", None)
 
     assert llm.list_models() == ["model-a", "model-b"]
     assert fake_client.closed is True
 
 
+def test_list_models_is_cached_until_ttl_expires(monkeypatch):
+    calls = []
+
+    class FakeOpenAI:
+        def __init__(self, **kwargs):
+            calls.append(kwargs)
+            self.models = self
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def list(self):
+            return [SimpleNamespace(id=f"model-{len(calls)}")]
+
+    clock = [1000.0]
+    monkeypatch.setattr(llm, "OpenAI", FakeOpenAI)
+    monkeypatch.setattr(llm, "_models_cache", None)
+    monkeypatch.setattr(llm.time, "monotonic", lambda: clock[0])
+
+    assert llm.list_models() == ["model-1"]
+    clock[0] += llm.MODELS_CACHE_TTL_SECONDS - 1
+    assert llm.list_models() == ["model-1"]
+    assert len(calls) == 1
+
+    clock[0] += 2
+    assert llm.list_models() == ["model-2"]
+    assert len(calls) == 2
+
+
+def test_provider_is_shared_within_an_event_loop():
+    async def two_providers():
+        return llm.get_provider(), llm.get_provider()
+
+    first, second = asyncio.run(two_providers())
+    assert first is second
+
+    third, _ = asyncio.run(two_providers())
+    assert third is not first
+
+
 def test_extraction_sanitizes_upstream_http_error(monkeypatch, client):
-    def reject_model(*args, **kwargs):
+    async def reject_model(*args, **kwargs):
         raise ModelHTTPError(
             status_code=409,
             model_name="broken-model",
@@ -86,7 +134,7 @@ def test_extraction_sanitizes_upstream_http_error(monkeypatch, client):
 
 
 def test_extraction_sanitizes_provider_connection_error(monkeypatch, client):
-    def connection_error(*args, **kwargs):
+    async def connection_error(*args, **kwargs):
         raise ModelAPIError("offline-model", "Connection error to private host")
 
     monkeypatch.setattr(workflow, "ioc_extraction_agent_workflow", connection_error)
@@ -99,3 +147,79 @@ def test_extraction_sanitizes_provider_connection_error(monkeypatch, client):
     assert response.status_code == 502
     assert response.json()["detail"] == "LLM request failed for model 'offline-model'."
     assert "private host" not in response.text
+
+
+def test_extraction_with_failing_model_returns_502(monkeypatch, client):
+    calls = []
+
+    def reject(messages, info):
+        calls.append(messages)
+        raise ModelHTTPError(status_code=404, model_name="missing-model")
+
+    # The real workflow runs; only the model behind every agent is replaced
+    monkeypatch.setattr(agents, "build_model", lambda model_name: FunctionModel(reject))
+
+    response = client.post(
+        "/cases/CASE-1/extract",
+        json={"incident_description": "Incident", "llm_model": "missing-model"},
+    )
+
+    assert response.status_code == 502
+    assert "upstream status 404" in response.json()["detail"]
+    # Triage surfaces the failure before any extraction is attempted
+    assert len(calls) == 1
+
+
+def test_extraction_saves_results_tagged_with_case_id(monkeypatch, client):
+    host_ioc = HostIOCOutputFormat(
+        submitted_by="analyst",
+        source="EDR",
+        status="Confirmed",
+        indicator_id="H-1",
+        indicator_type="file",
+        indicator="evil.exe",
+    )
+
+    async def extract(**kwargs):
+        return {"host_ioc_objects": [host_ioc, host_ioc]}
+
+    monkeypatch.setattr(workflow, "ioc_extraction_agent_workflow", extract)
+    saved = []
+
+    def insert(*rows):
+        saved.append(rows)
+        # The duplicate indicator is skipped by the database
+        return {"host_iocs": 1, "network_iocs": 0, "timeline_events": 0}
+
+    monkeypatch.setattr(workflow, "insert_extraction_results", insert)
+
+    response = client.post(
+        "/cases/CASE-1/extract",
+        json={"incident_description": "Incident", "llm_model": "model"},
+    )
+
+    assert response.status_code == 200
+    # Counts report rows stored, not rows extracted
+    assert response.json()["counts"] == {
+        "host_iocs": 1,
+        "network_iocs": 0,
+        "timeline_events": 0,
+    }
+    host_row = {**host_ioc.model_dump(), "case_id": "CASE-1"}
+    assert saved == [([host_row, host_row], [], [])]
+
+
+def test_extraction_for_unknown_case_is_404_without_llm_calls(monkeypatch, client):
+    monkeypatch.setattr(workflow, "case_exists", lambda case_id: False)
+
+    async def fail(**kwargs):
+        raise AssertionError("workflow must not run for an unknown case")
+
+    monkeypatch.setattr(workflow, "ioc_extraction_agent_workflow", fail)
+
+    response = client.post(
+        "/cases/CASE-404/extract",
+        json={"incident_description": "Incident", "llm_model": "model"},
+    )
+
+    assert response.status_code == 404
@@ -3,26 +3,77 @@ import sys
 
 # Add parent directory to sys.path to allow imports from root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
 import json
 from backend.utils.ioc_extraction_workflow import ioc_extraction_agent_workflow
 from backend.utils.llm import LLM_API_KEY, LLM_BASE_URL
 import logging
 from backend.utils.logging_config import setup_logging
 from openai import OpenAI
+from pydantic_core import to_json
 
 STATE_FILE = "tests/test_state.json"
+# Workflows evaluated at once; their LLM calls are further capped by LLM_CONCURRENCY
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "2"))
 
 
 def load_state():
+    """Names of the tests that already completed in an interrupted run."""
     if os.path.exists(STATE_FILE):
         with open(STATE_FILE, "r") as f:
-            return json.load(f)
-    return {"last_model_index": -1, "last_case_index": -1}
+            return set(json.load(f).get("completed", []))
+    return set()
 
 
-def save_state(state):
+def save_state(completed):
     with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=4)
+        json.dump({"completed": sorted(completed)}, f, indent=4)
+
+
+async def run_tests(models, case_files, logger):
+    """
+    Run every (model, case) pair concurrently, skipping pairs completed earlier.
+
+    Returns True when every test completed.
+    """
+    completed = load_state()
+    semaphore = asyncio.Semaphore(EVAL_CONCURRENCY)
+
+    async def run_one(model, case_file):
+        case_number = os.path.splitext(case_file)[0].split("_")[1]
+        test_name = f"test-{case_number}-{model.replace(':', '_')}"
+        output_file = f"tests/test_results/{test_name}.json"
+        if test_name in completed:
+            return True
+
+        with open(os.path.join("cases", case_file), "r") as f:
+            incident_description = f.read()
+
+        async with semaphore:
+            logger.info(f"Running test: {test_name}")
+            try:
+                result = await ioc_extraction_agent_workflow(
+                    llm_model=model,
+                    case_id=case_number,
+                    incident_description=incident_description,
+                )
+            except Exception as e:
+                logger.error(f"Test {test_name} failed: {e}")
+                return False
+
+        # Serialize the Pydantic models (datetimes included) in one pass
+        with open(output_file, "wb") as f:
+            f.write(to_json(result, indent=4))
+
+        logger.info(f"Test {test_name} completed successfully.")
+        completed.add(test_name)
+        save_state(completed)
+        return True
+
+    results = await asyncio.gather(
+        *(run_one(model, case_file) for model in models for case_file in case_files)
+    )
+    return all(results)
 
 
 def main():
@@ -57,79 +108,12 @@ def main():
     # Get case files
     case_files = sorted([f for f in os.listdir("cases") if f.endswith(".txt")])
 
-    state = load_state()
-    last_model_index = state.get("last_model_index", -1)
-    last_case_index = state.get("last_case_index", -1)
-
-    start_model_index = last_model_index if last_model_index != -1 else 0
-
-    for model_index in range(start_model_index, len(models)):
-        model = models[model_index]
-
-        start_case_index = 0
-        if model_index == last_model_index:
-            start_case_index = last_case_index + 1
-
-        for case_index in range(start_case_index, len(case_files)):
-            case_file = case_files[case_index]
-            case_number = os.path.splitext(case_file)[0].split("_")[1]
-            test_name = f"test-{case_number}-{model.replace(':', '_')}"
-            output_file = f"tests/test_results/{test_name}.json"
-
-            logger.info(f"Running test: {test_name}")
-
-            with open(os.path.join("cases", case_file), "r") as f:
-                incident_description = f.read()
-
-            try:
-                result = ioc_extraction_agent_workflow(
-                    llm_model=model,
-                    case_id=case_number,
-                    incident_description=incident_description,
-                )
-
-                # Convert Pydantic models to dicts
-                if result.get("host_ioc_objects"):
-                    result["host_ioc_objects"] = [
-                        ioc.model_dump() for ioc in result["host_ioc_objects"]
-                    ]
-                if result.get("network_ioc_objects"):
-                    result["network_ioc_objects"] = [
-                        ioc.model_dump() for ioc in result["network_ioc_objects"]
-                    ]
-                if result.get("timeline_objects"):
-                    result["timeline_objects"] = [
-                        event.model_dump() for event in result["timeline_objects"]
-                    ]
-
-                # Convert datetime objects to strings
-                def default_serializer(o):
-                    if hasattr(o, "isoformat"):
-                        return o.isoformat()
-                    raise TypeError(
-                        f"Object of type {o.__class__.__name__} is not JSON serializable"
-                    )
-
-                with open(output_file, "w") as f:
-                    json.dump(result, f, indent=4, default=default_serializer)
-
-                logger.info(f"Test {test_name} completed successfully.")
-
-                # Save state
-                save_state(
-                    {"last_model_index": model_index, "last_case_index": case_index}
-                )
-
-            except Exception as e:
-                logger.error(f"Test {test_name} failed: {e}")
-                # Save state up to the failed test
-                save_state(
-                    {"last_model_index": model_index, "last_case_index": case_index - 1}
-                )
-                return  # Stop execution on failure
+    if not asyncio.run(run_tests(models, case_files, logger)):
+        logger.error("Some tests failed; re-run to retry only the unfinished ones.")
+        return
 
     # Reset state after all tests are completed
-    save_state({"last_model_index": -1, "last_case_index": -1})
+    save_state(set())
     logger.info("All tests completed successfully.")
 
 
@@ -8,13 +8,14 @@ max-attempts behaviour, and validation-failure handling.
 Run with: ``uv run pytest tests/test_workflow_unit.py``
 """
 
+import asyncio
 import json
 from typing import Any
 
 import pytest
 from pydantic import TypeAdapter, ValidationError
 from pydantic_ai import Agent, NativeOutput
-from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, UserPromptPart
 from pydantic_ai.models.function import AgentInfo, FunctionModel
 
 from backend.utils import agents
@@ -24,6 +25,7 @@ from backend.utils.agents import (
     NetworkIOCOutputList,
     TimelineOutputList,
     TriageDecision,
+    TriageResult,
 )
 from backend.utils.ioc_extraction_workflow import ioc_extraction_agent_workflow
 
@@ -34,7 +36,7 @@ MODEL = "test-model"
 # ---------------------------------------------------------------------------
 
 CONTINUE = {"response": "continue"}
-SKIP = {"response": "skip"}
+BOTH_CONTINUE = {"host": "continue", "network": "continue"}
 PERFECT = {"verdict": "perfect", "feedback": None}
 
 HOST_IOC = {
@@ -105,15 +107,19 @@ class ScriptedModel:
     def __call__(self, messages: list, info: AgentInfo) -> ModelResponse:
         self.calls.append(messages)
         payload = self.payloads[min(len(self.calls) - 1, len(self.payloads) - 1)]
-        return ModelResponse(parts=[TextPart(content=json.dumps(payload))])
-
-    def instructions(self, call_index: int) -> str:
-        """Combined instructions string the model saw on the given call."""
-        return "\n".join(
-            m.instructions or ""
+        # A str payload is sent verbatim, e.g. to simulate a truncated reply
+        content = payload if isinstance(payload, str) else json.dumps(payload)
+        return ModelResponse(parts=[TextPart(content=content)])
+
+    def user_prompts(self, call_index: int) -> list[str]:
+        """User prompts in the conversation the model saw on the given call."""
+        return [
+            part.content
             for m in self.calls[call_index]
             if isinstance(m, ModelRequest)
-        )
+            for part in m.parts
+            if isinstance(part, UserPromptPart)
+        ]
 
 
 def _fake_agent(scripted: ScriptedModel, output_type: Any, name: str) -> Agent:
@@ -134,8 +140,7 @@ def scripted(monkeypatch):
     seen instructions are asserted via the ScriptedModel instances.
     """
     models = {
-        "triage_host": ScriptedModel([CONTINUE]),
-        "triage_network": ScriptedModel([CONTINUE]),
+        "triage": ScriptedModel([BOTH_CONTINUE]),
         "host": ScriptedModel([{"iocs": [HOST_IOC]}]),
         "network": ScriptedModel([{"iocs": [NETWORK_IOC]}]),
         "timeline": ScriptedModel([{"iocs": [TIMELINE_EVENT]}]),
@@ -145,8 +150,7 @@ def scripted(monkeypatch):
     }
 
     agent_by_getter = {
-        "get_triage_host_agent": _fake_agent(models["triage_host"], TriageDecision, "triage_host"),
-        "get_triage_network_agent": _fake_agent(models["triage_network"], TriageDecision, "triage_network"),
+        "get_triage_agent": _fake_agent(models["triage"], TriageResult, "triage"),
         "get_host_extraction_agent": _fake_agent(models["host"], HostIOCOutputList, "extract_host"),
         "get_network_extraction_agent": _fake_agent(models["network"], NetworkIOCOutputList, "extract_network"),
         "get_timeline_extraction_agent": _fake_agent(models["timeline"], TimelineOutputList, "extract_timeline"),
@@ -166,8 +170,10 @@ def scripted(monkeypatch):
 
 
 def run_workflow() -> dict:
-    return ioc_extraction_agent_workflow(
-        llm_model=MODEL, case_id="CASE-1", incident_description="Incident narrative."
+    return asyncio.run(
+        ioc_extraction_agent_workflow(
+            llm_model=MODEL, case_id="CASE-1", incident_description="Incident narrative."
+        )
     )
 
 
@@ -190,10 +196,22 @@ def test_all_branches_run_and_results_merged(scripted):
     assert len(scripted["host"].calls) == 1
     assert len(scripted["network"].calls) == 1
     assert len(scripted["timeline"].calls) == 1
+    # Host and network triage share one call over the description
+    assert len(scripted["triage"].calls) == 1
+
+
+def test_indicator_ids_are_unique_within_and_across_runs(scripted):
+    scripted["host"].payloads = [{"iocs": [host_ioc("a.exe"), host_ioc("b.exe")]}]
+
+    first = [ioc.indicator_id for ioc in run_workflow()["host_ioc_objects"]]
+    second = [ioc.indicator_id for ioc in run_workflow()["host_ioc_objects"]]
+
+    assert len(set(first + second)) == 4
+    assert all(indicator_id.startswith("H-") for indicator_id in first + second)
 
 
 def test_host_triage_skip_never_invokes_extraction(scripted):
-    scripted["triage_host"].payloads = [SKIP]
+    scripted["triage"].payloads = [{"host": "skip", "network": "continue"}]
 
     result = run_workflow()
 
@@ -204,6 +222,17 @@ def test_host_triage_skip_never_invokes_extraction(scripted):
     assert len(result["timeline_objects"]) == 1
 
 
+def test_invalid_triage_output_falls_back_to_all_extractions(scripted):
+    # e.g. a reply cut off mid-object, which fails validation on every retry
+    scripted["triage"].payloads = ['{"host": "cont']
+
+    result = run_workflow()
+
+    assert len(result["host_ioc_objects"]) == 1
+    assert len(result["network_ioc_objects"]) == 1
+    assert len(result["timeline_objects"]) == 1
+
+
 def test_refine_loop_feeds_feedback_back_into_prompt(scripted):
     scripted["eval_host"].payloads = [
         {"verdict": "needs_improvement", "feedback": "MISSING: add evil.dll"},
@@ -214,9 +243,16 @@ def test_refine_loop_feeds_feedback_back_into_prompt(scripted):
     result = run_workflow()
 
     assert len(scripted["host"].calls) == 3
-    assert "MISSING" not in scripted["host"].instructions(0)
-    assert "MISSING: add evil.dll" in scripted["host"].instructions(1)
-    assert "STILL MISSING: evil.dll" in scripted["host"].instructions(2)
+    assert scripted["host"].user_prompts(0) == ["Incident narrative."]
+    # Each refinement continues the previous conversation with a feedback turn,
+    # keeping the instructions and description as an unchanged prefix
+    first_refinement = scripted["host"].user_prompts(1)
+    assert first_refinement[0] == "Incident narrative."
+    assert "MISSING: add evil.dll" in first_refinement[-1]
+    second_refinement = scripted["host"].user_prompts(2)
+    assert second_refinement[:2] == first_refinement
+    assert "STILL MISSING: evil.dll" in second_refinement[-1]
+    assert "MISSING" not in scripted["host"].calls[2][-1].instructions
     assert len(result["host_ioc_objects"]) == 1
 
 
@@ -301,17 +337,57 @@ def test_request_scoped_model_is_entered_and_closed(monkeypatch):
     assert model.exited == 1
 
 
+def test_run_agent_limits_concurrent_llm_calls(monkeypatch):
+    in_flight = 0
+    peak = 0
+
+    async def slow_model(messages: list, info: AgentInfo) -> ModelResponse:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return ModelResponse(parts=[TextPart(content=json.dumps(CONTINUE))])
+
+    agent = Agent(
+        FunctionModel(slow_model),
+        output_type=NativeOutput(TriageDecision),
+        name="concurrency_limit",
+    )
+    monkeypatch.setattr(agents, "LLM_CONCURRENCY", 2)
+
+    async def run_many():
+        return await asyncio.gather(
+            *(agents.run_agent(agent, MODEL, "Incident narrative.") for _ in range(6))
+        )
+
+    results = asyncio.run(run_many())
+
+    assert [result.output for result in results] == ["continue"] * 6
+    assert peak == 2
+
+
 def test_agent_cache_is_bounded():
-    agents.get_triage_host_agent.cache_clear()
+    agents.get_triage_agent.cache_clear()
     try:
         for index in range(40):
-            agents.get_triage_host_agent(f"model-{index}")
+            agents.get_triage_agent(f"model-{index}")
 
-        cache_info = agents.get_triage_host_agent.cache_info()
+        cache_info = agents.get_triage_agent.cache_info()
         assert cache_info.maxsize == 32
         assert cache_info.currsize == 32
     finally:
-        agents.get_triage_host_agent.cache_clear()
+        agents.get_triage_agent.cache_clear()
+
+
+def test_classifier_agents_decode_greedily_without_token_cap():
+    triage_agent = agents.get_triage_agent(MODEL)
+    evaluation_agent = agents.get_evaluation_agent(MODEL, "host")
+    assert triage_agent.model_settings["temperature"] == 0.0
+    assert evaluation_agent.model_settings["temperature"] == 0.0
+    # Reasoning models need room to think before answering
+    assert "max_tokens" not in triage_agent.model_settings
+    assert "max_tokens" not in evaluation_agent.model_settings
 
 
 # ---------------------------------------------------------------------------
@@ -335,3 +411,6 @@ def test_triage_decision_validation():
     assert adapter.validate_python("skip") == "skip"
     with pytest.raises(ValidationError):
         adapter.validate_python("bogus")
+    assert TriageResult(host="skip", network="continue").network == "continue"
+    with pytest.raises(ValidationError):
+        TriageResult(host="continue")